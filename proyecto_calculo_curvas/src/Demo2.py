@@ -9,6 +9,11 @@ from scipy import interpolate, integrate
 import sympy as sp
 from matplotlib.ticker import MaxNLocator
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.calculos_numericos import longitudes_lote
+from src.ajuste_curva import ajuste_por_intervalos, ajuste_por_intervalos_adaptativo
+from src.modelos import ModeloPolinomio
+
 # Configuramos el estilo de seaborn
 sns.set_theme(style="whitegrid")
 sns.set_context("notebook", font_scale=1.2)
@@ -183,7 +188,7 @@ def calcular_longitud_curva(funcion, x_min, x_max, num_puntos=100):
 
 # ===== FUNCIÓN PRINCIPAL =====
 
-def main(ruta_imagen=None, num_intervalos=5):
+def main(ruta_imagen=None, num_intervalos=5, tolerancia=None):
     """
     Función principal para procesar una imagen y calcular la longitud de una curva
     usando únicamente el método de ajuste polinómico y modelando por intervalos.
@@ -191,6 +196,9 @@ def main(ruta_imagen=None, num_intervalos=5):
     Args:
         ruta_imagen: ruta a la imagen a procesar. Si es None, se usa una imagen de ejemplo.
         num_intervalos: número de intervalos para modelar la función.
+        tolerancia: si se indica, los intervalos se eligen de forma adaptativa
+            (error cuadrático medio máximo en píxeles por intervalo) y
+            num_intervalos es el máximo de intervalos.
     """
     # Si no se especifica una ruta, usar datos de ejemplo
     if ruta_imagen is None:
@@ -244,62 +252,36 @@ def main(ruta_imagen=None, num_intervalos=5):
         Returns:
             Lista de tuplas (intervalo, función, coeficientes, longitud)
         """
-        # Ordenar puntos por coordenada x
-        puntos_ordenados = puntos[np.argsort(puntos[:, 0])]
+        # Ajustar todos los intervalos (orden único y búsqueda binaria de los extremos)
+        try:
+            if tolerancia is not None:
+                # Partir solo donde el ajuste no cumple la tolerancia
+                ajuste = ajuste_por_intervalos_adaptativo(puntos, tolerancia, grado=3,
+                                                          max_segmentos=num_intervalos)
+                print(f"Intervalos adaptativos: {len(ajuste['limites']) - 1} "
+                      f"(tolerancia {'cumplida' if ajuste['cumple_tolerancia'] else 'no cumplida'})")
+            else:
+                ajuste = ajuste_por_intervalos(puntos, num_intervalos, grado=3, x_min=x_min, x_max=x_max)
+        except ValueError as e:
+            print(f"Error ajustando por intervalos: {e}")
+            return []
         
-        # Crear intervalos
-        limites = np.linspace(x_min, x_max, num_intervalos + 1)
         modelos = []
-        
-        for i in range(num_intervalos):
-            # Definir límites del intervalo actual
-            inicio = limites[i]
-            fin = limites[i+1]
-            
-            # Seleccionar puntos en este intervalo
-            mask = (puntos_ordenados[:, 0] >= inicio) & (puntos_ordenados[:, 0] <= fin)
-            puntos_intervalo = puntos_ordenados[mask]
+        limites = ajuste['limites']
+        for i, coefs in enumerate(ajuste['coeficientes']):
+            intervalo = (limites[i], limites[i + 1])
             
-            # Si hay menos de 4 puntos, ajustar con un polinomio de menor grado
-            if len(puntos_intervalo) < 4:
-                grado = min(len(puntos_intervalo) - 1, 2)
-                if grado < 1:  # Si no hay suficientes puntos, usar puntos cercanos
-                    # Buscar los 4 puntos más cercanos al intervalo
-                    distancias = np.minimum(
-                        np.abs(puntos_ordenados[:, 0] - inicio),
-                        np.abs(puntos_ordenados[:, 0] - fin)
-                    )
-                    indices = np.argsort(distancias)[:4]
-                    puntos_intervalo = puntos_ordenados[indices]
-                    grado = min(len(puntos_intervalo) - 1, 3)
-            else:
-                grado = 3  # Usar grado 3 si hay suficientes puntos
-            
-            # Ajustar polinomio para este intervalo
-            if len(puntos_intervalo) > 1:
-                # Usar np.polyfit directamente para tener acceso a los coeficientes
-                coefs = np.polyfit(puntos_intervalo[:, 0], puntos_intervalo[:, 1], grado)
-                
-                # Crear función lambda para este polinomio
-                def funcion_intervalo(x, coeficientes=coefs):
-                    return np.polyval(coeficientes, x)
-                
-                # Calcular longitud de este segmento
-                try:
-                    longitud = calcular_longitud_curva(funcion_intervalo, inicio, fin, num_puntos=50)
-                except Exception as e:
-                    print(f"Error calculando longitud en intervalo [{inicio:.2f}, {fin:.2f}]: {e}")
-                    longitud = 0
-                
-                # Guardar intervalo, función y coeficientes
-                modelos.append((
-                    (inicio, fin), 
-                    funcion_intervalo, 
-                    coefs, 
-                    longitud
-                ))
+            # Guardar intervalo, modelo del polinomio y coeficientes
+            modelos.append((intervalo, ModeloPolinomio(coefs, *intervalo), coefs))
+        
+        # Calcular la longitud de todos los segmentos en una sola pasada
+        try:
+            longitudes = longitudes_lote([m[2] for m in modelos], [m[0] for m in modelos])
+        except Exception as e:
+            print(f"Error calculando longitudes de los intervalos: {e}")
+            longitudes = np.zeros(len(modelos))
         
-        return modelos
+        return [modelo + (longitud,) for modelo, longitud in zip(modelos, longitudes)]
     
     # Modelar por intervalos
     modelos_intervalos = modelar_por_intervalos(puntos, x_min, x_max, num_intervalos)
@@ -15,8 +15,10 @@ from datetime import datetime
 import sys
 sys.path.append(os.path.abspath('.'))
 try:
-    from src.ajuste_curva import ajuste_polinomio, ajuste_spline
-    from src.calculos_numericos import longitud_arco, derivada_numerica
+    from src.ajuste_curva import barrido_grados, crear_funcion_polinomio, ajuste_polinomio_robusto
+    from src.modelos import ModeloAjustado
+    from src.cache_ajustes import ajuste_polinomio_cache, ajuste_spline_cache, ajuste_spline_automatico_cache
+    from src.calculos_numericos import longitud_arco, derivada_numerica, longitudes_lote
 except ImportError:
     print("Advertencia: No se pudieron importar algunos módulos locales.")
 
@@ -69,7 +71,8 @@ def guardar_modelo_funcion(funcion, tipo_funcion, params, nombre_archivo, direct
     Guarda información sobre una función ajustada.
     
     Args:
-        funcion: Función Python que representa el modelo
+        funcion: Función Python que representa el modelo; si es un modelo
+            de src.modelos se guarda completo y se puede reconstruir tal cual
         tipo_funcion: String que indica el tipo ('polinomio', 'spline', etc.)
         params: Diccionario con los parámetros del modelo (grado, coeficientes, etc.)
         nombre_archivo: Nombre base para el archivo
@@ -88,11 +91,17 @@ def guardar_modelo_funcion(funcion, tipo_funcion, params, nombre_archivo, direct
         'fecha_creacion': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
     
+    # Los modelos ajustados se pueden serializar directamente
+    if isinstance(funcion, ModeloAjustado):
+        info_modelo['modelo'] = funcion
+    
     # Para polinomios, podemos guardar directamente los coeficientes
     if tipo_funcion == 'polinomio':
-        # Extraer coeficientes si están en los parámetros
+        # Extraer coeficientes de los parámetros o del propio modelo
         if 'coeficientes' in params:
             info_modelo['coeficientes'] = params['coeficientes']
+        elif getattr(funcion, 'coeficientes', None) is not None:
+            info_modelo['coeficientes'] = funcion.coeficientes
     
     # Guardar información en formato pickle
     ruta_pickle = os.path.join(directorio, f"{nombre_archivo}_modelo.pkl")
@@ -143,6 +152,10 @@ def reconstruir_funcion(info_modelo):
     Returns:
         Función reconstruida que puede ser evaluada
     """
+    # Los archivos con el modelo completo no necesitan reconstrucción
+    if info_modelo.get('modelo') is not None:
+        return info_modelo['modelo']
+    
     tipo = info_modelo['tipo_funcion']
     params = info_modelo['parametros']
     
@@ -155,10 +168,7 @@ def reconstruir_funcion(info_modelo):
         else:
             raise ValueError("No se encontraron coeficientes para reconstruir el polinomio")
         
-        def funcion_reconstruida(x):
-            return np.polyval(coefs, x)
-        
-        return funcion_reconstruida
+        return crear_funcion_polinomio(coefs, params.get('x_min', -np.inf), params.get('x_max', np.inf))
     
     elif tipo == 'spline':
         # Para splines necesitamos los puntos originales y parámetros
@@ -241,7 +251,7 @@ def guardar_muestreo_funcion(funcion, x_min, x_max, nombre_archivo, num_puntos=1
 
 # ----- Funciones para cálculo y gestión de resultados -----
 
-def calcular_longitud_por_tramos(funcion, x_min, x_max, num_tramos=10):
+def calcular_longitud_por_tramos(funcion, x_min, x_max, num_tramos=10, metodo='simpson', tabla=None):
     """
     Calcula la longitud de una curva por tramos y guarda los resultados.
     
@@ -250,6 +260,9 @@ def calcular_longitud_por_tramos(funcion, x_min, x_max, num_tramos=10):
         x_min: Límite inferior del intervalo
         x_max: Límite superior del intervalo
         num_tramos: Número de tramos en los que dividir el intervalo
+        metodo: Regla de integración de cada tramo ('simpson' o 'gauss')
+        tabla: TablaLongitudArco de la función; si se da, las longitudes de
+               los tramos se leen de la tabla en lugar de integrarse
     
     Returns:
         DataFrame con las longitudes por tramo y la longitud total
@@ -257,17 +270,28 @@ def calcular_longitud_por_tramos(funcion, x_min, x_max, num_tramos=10):
     # Dividir el intervalo en tramos
     puntos_tramos = np.linspace(x_min, x_max, num_tramos + 1)
     
+    # Con una tabla acumulada o un polinomio todos los tramos se calculan de una vez
+    coeficientes = getattr(funcion, 'coeficientes', None)
+    if tabla is not None:
+        longitudes_calculadas = tabla.longitud_entre(puntos_tramos[:-1], puntos_tramos[1:])
+    elif coeficientes is not None:
+        limites = np.column_stack((puntos_tramos[:-1], puntos_tramos[1:]))
+        longitudes_calculadas = longitudes_lote([coeficientes] * num_tramos, limites)
+    
     # Calcular la longitud en cada tramo
     longitudes = []
     for i in range(num_tramos):
         a = puntos_tramos[i]
         b = puntos_tramos[i+1]
         
-        try:
-            longitud_tramo = longitud_arco(funcion, a, b)
-        except Exception as e:
-            print(f"Error al calcular longitud en tramo [{a}, {b}]: {e}")
-            longitud_tramo = 0
+        if tabla is not None or coeficientes is not None:
+            longitud_tramo = longitudes_calculadas[i]
+        else:
+            try:
+                longitud_tramo = longitud_arco(funcion, a, b, metodo=metodo)
+            except Exception as e:
+                print(f"Error al calcular longitud en tramo [{a}, {b}]: {e}")
+                longitud_tramo = 0
         
         longitudes.append({
             'tramo': i+1,
@@ -407,15 +431,19 @@ def visualizar_resultados(puntos, funcion, x_min, x_max, longitud_total,
 
 # ----- Funciones para procesamiento por lotes -----
 
-def procesar_multiples_curvas(lista_puntos, grados_polinomio=None, parametros_spline=None, guardar_resultados=True):
+def procesar_multiples_curvas(lista_puntos, grados_polinomio=None, parametros_spline=None, guardar_resultados=True,
+                              robusto=False):
     """
     Procesa múltiples curvas aplicando diferentes ajustes y calculando longitudes.
     
     Args:
         lista_puntos: Lista de arrays NumPy con puntos (x,y)
         grados_polinomio: Lista de grados para ajustar polinomios
-        parametros_spline: Lista de parámetros s para ajustar splines
+        parametros_spline: Lista de parámetros s para ajustar splines; 'auto'
+            elige el suavizado por validación cruzada generalizada
         guardar_resultados: Si True, guarda todos los resultados
+        robusto: Si True, descarta antes los puntos atípicos con un ajuste
+            robusto (RANSAC) del mayor grado de polinomio
     
     Returns:
         DataFrame con un resumen de los resultados
@@ -424,7 +452,7 @@ def procesar_multiples_curvas(lista_puntos, grados_polinomio=None, parametros_sp
         grados_polinomio = [2, 3, 4]
     
     if parametros_spline is None:
-        parametros_spline = [0.1, 0.5, 1.0]
+        parametros_spline = ['auto']  # Un solo ajuste con suavizado automático
     
     # Lista para almacenar los resultados
     resultados = []
@@ -433,6 +461,15 @@ def procesar_multiples_curvas(lista_puntos, grados_polinomio=None, parametros_sp
     for i, puntos in enumerate(lista_puntos):
         print(f"\nProcesando curva {i+1}/{len(lista_puntos)}...")
         
+        # Descartar puntos atípicos (bordes sueltos, sombras, fondo)
+        if robusto:
+            try:
+                ajuste = ajuste_polinomio_robusto(puntos, grado=max(grados_polinomio))
+                print(f"  Ajuste robusto: {np.count_nonzero(~ajuste['inliers'])} puntos atípicos descartados")
+                puntos = puntos[ajuste['inliers']]
+            except Exception as e:
+                print(f"  Error en el ajuste robusto: {e}")
+        
         # Límites para cálculos
         x_min = min(puntos[:, 0])
         x_max = max(puntos[:, 0])
@@ -441,12 +478,23 @@ def procesar_multiples_curvas(lista_puntos, grados_polinomio=None, parametros_sp
         if guardar_resultados:
             guardar_puntos_curva(puntos, f"curva_{i+1}_puntos")
         
+        # Ajustar todos los grados con una sola factorización y elegir el mejor por BIC
+        try:
+            barrido = barrido_grados(puntos, grados=grados_polinomio)
+            print(f"  Mejor grado según BIC: {barrido['mejor_grado']}")
+        except Exception as e:
+            print(f"  Error en el barrido de grados: {e}")
+            barrido = None
+        
         # Ajustar polinomios de diferentes grados
         for grado in grados_polinomio:
             print(f"  Ajustando polinomio de grado {grado}...")
             
-            # Ajustar polinomio
-            funcion_polinomio = ajuste_polinomio(puntos, grado=grado)
+            # Tomar el polinomio del barrido, o ajustarlo por separado si falló
+            if barrido is not None:
+                funcion_polinomio = crear_funcion_polinomio(barrido['coeficientes'][grado], x_min, x_max)
+            else:
+                funcion_polinomio = ajuste_polinomio_cache(puntos, grado=grado)
             
             # Calcular longitud
             try:
@@ -480,6 +528,8 @@ def procesar_multiples_curvas(lista_puntos, grados_polinomio=None, parametros_sp
                     'tipo_ajuste': 'polinomio',
                     'parametro': grado,
                     'longitud': longitud_total,
+                    'bic': barrido['bic'][grado] if barrido is not None else np.nan,
+                    'mejor_grado': barrido is not None and grado == barrido['mejor_grado'],
                     'x_min': x_min,
                     'x_max': x_max
                 })
@@ -493,21 +543,29 @@ def procesar_multiples_curvas(lista_puntos, grados_polinomio=None, parametros_sp
             
             # Ajustar spline
             try:
-                funcion_spline = ajuste_spline(puntos, s=s)
+                info_modelo = {'s': s}
+                if s == 'auto':
+                    ajuste = ajuste_spline_automatico_cache(puntos)
+                    funcion_spline = ajuste['modelo']
+                    info_modelo['lambda'] = ajuste['lambda']
+                    info_modelo['suma_residuos'] = ajuste['suma_residuos']
+                    print(f"  Suavizado elegido por GCV: lambda={ajuste['lambda']:.3g}")
+                else:
+                    funcion_spline = ajuste_spline_cache(puntos, s=s)
                 
                 # Calcular longitud
                 df_longitudes, longitud_total = calcular_longitud_por_tramos(funcion_spline, x_min, x_max)
                 
                 # Guardar resultados si se solicita
                 if guardar_resultados:
-                    nombre_base = f"curva_{i+1}_spline_s{s:.1f}".replace('.', '_')
+                    if s == 'auto':
+                        nombre_base = f"curva_{i+1}_spline_auto"
+                    else:
+                        nombre_base = f"curva_{i+1}_spline_s{s:.1f}".replace('.', '_')
                     
                     # Guardar modelo
-                    info_modelo = {
-                        's': s,
-                        'x_min': x_min,
-                        'x_max': x_max
-                    }
+                    info_modelo['x_min'] = x_min
+                    info_modelo['x_max'] = x_max
                     guardar_modelo_funcion(funcion_spline, 'spline', info_modelo, nombre_base)
                     
                     # Guardar muestreo
@@ -546,7 +604,9 @@ def procesar_multiples_curvas(lista_puntos, grados_polinomio=None, parametros_sp
 
 # ----- Función principal para procesar una imagen completa -----
 
-def procesar_imagen_completa(ruta_imagen, nombre_base, grados_polinomio=None, parametros_spline=None):
+def procesar_imagen_completa(ruta_imagen, nombre_base, grados_polinomio=None, parametros_spline=None,
+                             robusto=False, tolerancia_decimado=None, max_puntos=5000,
+                             teselas=False, tamano_tesela=2048, forma=None, dtype=np.uint8):
     """
     Procesa una imagen completa: carga, detecta curva, ajusta funciones y calcula longitudes.
     
@@ -554,26 +614,57 @@ def procesar_imagen_completa(ruta_imagen, nombre_base, grados_polinomio=None, pa
         ruta_imagen: Ruta a la imagen a procesar
         nombre_base: Nombre base para los archivos generados
         grados_polinomio: Lista de grados para ajustar polinomios
-        parametros_spline: Lista de parámetros s para ajustar splines
+        parametros_spline: Lista de parámetros s para ajustar splines ('auto' por defecto)
+        robusto: Si True, descarta los puntos atípicos antes de ajustar
+        tolerancia_decimado: Desviación máxima en píxeles al reducir los puntos
+            del contorno (None = solo limitar su número)
+        max_puntos: Número máximo de puntos que se pasan a los ajustes
+            (None = sin límite)
+        teselas: Si True, la imagen se lee mapeada en memoria y se procesa por
+            teselas (imágenes muy grandes en .npy, raw o TIFF sin comprimir).
+            Los puntos son todos los píxeles de borde de la componente conexa
+            más grande, no el contorno exterior que da extraer_puntos_curva,
+            así que suele haber más puntos (ver extraer_puntos_curva_teselas)
+        tamano_tesela: Lado de las teselas en píxeles
+        forma, dtype: Forma (alto, ancho[, canales]) y tipo de los píxeles,
+            necesarios para leer archivos raw por teselas
     
     Returns:
         DataFrame con un resumen de los resultados
     """
-    from src.procesamiento import cargar_imagen, preprocesar_imagen, detectar_bordes, extraer_puntos_curva
+    from src.procesamiento import cargar_imagen, preprocesar_imagen, detectar_bordes, extraer_puntos_curva, decimar_contorno
     
     print(f"Procesando imagen: {ruta_imagen}")
     
     # Cargar y procesar la imagen
-    imagen = cargar_imagen(ruta_imagen)
-    imagen_preprocesada = preprocesar_imagen(imagen)
-    bordes = detectar_bordes(imagen_preprocesada)
-    puntos = extraer_puntos_curva(bordes)
+    if teselas:
+        from src.procesamiento_teselas import extraer_puntos_curva_teselas
+        resultado_teselas = extraer_puntos_curva_teselas(ruta_imagen, tamano_tesela, forma=forma,
+                                                         dtype=dtype, ordenar=False)
+        puntos = resultado_teselas['puntos']
+        print(f"Procesadas {resultado_teselas['teselas']} teselas: "
+              f"{resultado_teselas['fragmentos']} fragmentos en {resultado_teselas['componentes']} componentes")
+    else:
+        imagen = cargar_imagen(ruta_imagen)
+        imagen_preprocesada = preprocesar_imagen(imagen)
+        bordes = detectar_bordes(imagen_preprocesada)
+        # en orden de recorrido del contorno: el decimado necesita la poligonal real
+        puntos = extraer_puntos_curva(bordes, ordenar=False)
     
     # Verificar que tenemos suficientes puntos
     if len(puntos) < 4:
         print("Error: No se detectaron suficientes puntos en la curva.")
         return None
     
+    # Reducir los puntos para que el coste de los ajustes no dependa de la resolución
+    puntos, info_decimado = decimar_contorno(puntos, tolerancia_decimado, max_puntos)
+    if info_decimado['puntos_finales'] < info_decimado['puntos_originales']:
+        print(f"Decimado: {info_decimado['puntos_originales']} -> {info_decimado['puntos_finales']} puntos "
+              f"(desviación máxima {info_decimado['desviacion_maxima']:.2f} px)")
+    
+    # Los ajustes esperan los puntos ordenados por x
+    puntos = puntos[np.argsort(puntos[:, 0], kind='stable')]
+    
     # Guardar los puntos detectados
     guardar_puntos_curva(puntos, f"{nombre_base}_puntos")
     
@@ -582,9 +673,9 @@ def procesar_imagen_completa(ruta_imagen, nombre_base, grados_polinomio=None, pa
         grados_polinomio = [3]  # Por defecto usamos grado 3
     
     if parametros_spline is None:
-        parametros_spline = [0.1]  # Por defecto usamos s=0.1
+        parametros_spline = ['auto']  # Por defecto elegimos el suavizado automáticamente
     
     # Usar la función de procesamiento por lotes
-    df_resultados = procesar_multiples_curvas([puntos], grados_polinomio, parametros_spline, True)
+    df_resultados = procesar_multiples_curvas([puntos], grados_polinomio, parametros_spline, True, robusto)
     
     return df_resultados
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""
+Núcleos numéricos con backend opcional de numba.
+Solo longitudes_polinomios tiene dos backends: el integrando
+sqrt(1 + p'(x)^2) de muchos polinomios a la vez (Horner de la derivada en
+cada nodo) se calcula con un bucle compilado con JIT si numba está
+instalado, sin los arreglos intermedios que crea Horner en NumPy. La
+compilación se guarda en disco (cache=True), así que solo la paga la
+primera ejecución y no cada proceso. Los dos backends hacen las mismas
+operaciones en el mismo orden y la suma con los pesos es en ambos el mismo
+producto de NumPy, así que dan exactamente el mismo resultado. Las sumas
+de Simpson y de la poligonal y la eliminación de abscisas repetidas de
+ajuste_spline ya son operaciones vectorizadas de NumPy y no tienen
+backend. El backend puede forzarse con configurar_backend() y
+consultarse con backend_utilizado().
+"""
+
+import numpy as np
+
+# Intentar importar numba (dependencia opcional)
+try:
+    import numba
+    NUMBA_DISPONIBLE = True
+except ImportError:
+    NUMBA_DISPONIBLE = False
+
+# Backend solicitado: 'auto', 'numba' o 'numpy'
+_backend_solicitado = 'auto'
+
+# Backend que ejecutó la última llamada de cada núcleo
+_ultimo_backend = {}
+
+# Por debajo de estas evaluaciones (curvas x nodos) NumPy es igual de rápido
+# y se evita el arranque de numba (unas décimas de segundo por proceso)
+MIN_EVALUACIONES_NUMBA = 200000
+
+# ----- Configuración del backend -----
+
+def configurar_backend(nombre='auto'):
+    """
+    Selecciona el backend de los núcleos numéricos.
+
+    Args:
+        nombre: 'auto' (numba si está disponible), 'numba' o 'numpy'
+
+    Returns:
+        Nombre del backend que se usará efectivamente
+    """
+    global _backend_solicitado
+
+    if nombre not in ('auto', 'numba', 'numpy'):
+        raise ValueError(f"Backend no reconocido: {nombre}")
+    if nombre == 'numba' and not NUMBA_DISPONIBLE:
+        raise ImportError("numba no está instalado")
+
+    _backend_solicitado = nombre
+    return backend_activo()
+
+def backend_activo():
+    """Devuelve el backend que usarán las próximas llamadas ('numba' o 'numpy')"""
+    if _backend_solicitado == 'numpy' or not NUMBA_DISPONIBLE:
+        return 'numpy'
+    return 'numba'
+
+def backend_utilizado(nucleo=None):
+    """
+    Indica qué backend ejecutó la última llamada de un núcleo. El único
+    núcleo con dos backends es longitudes_polinomios; suma_simpson,
+    longitud_poligonal y pesos_simpson siempre usan NumPy y no se registran.
+
+    Args:
+        nucleo: nombre del núcleo ('longitudes_polinomios'); si es None se
+                devuelven todos
+
+    Returns:
+        Nombre del backend, o diccionario núcleo -> backend
+    """
+    if nucleo is None:
+        return dict(_ultimo_backend)
+    return _ultimo_backend.get(nucleo)
+
+# ----- Implementaciones en NumPy -----
+
+def _integrando_polinomios_numpy(derivadas, a, ancho, u):
+    # matriz (curvas x nodos) y derivada por Horner
+    x = a[:, None] + ancho[:, None] * u[None, :]
+    derivada = np.zeros_like(x)
+    for j in range(derivadas.shape[1]):
+        derivada = derivada * x + derivadas[:, j, None]
+    return np.sqrt(1 + derivada * derivada)
+
+# ----- Implementaciones compiladas con numba -----
+
+if NUMBA_DISPONIBLE:
+    # mismas operaciones y en el mismo orden que la versión NumPy (sin fastmath)
+    @numba.njit(cache=True)
+    def _integrando_polinomios_numba(derivadas, a, ancho, u):
+        num_curvas, num_coeficientes = derivadas.shape
+        integrando = np.empty((num_curvas, u.shape[0]))
+        for i in range(num_curvas):
+            for k in range(u.shape[0]):
+                x = a[i] + ancho[i] * u[k]
+                derivada = 0.0
+                for j in range(num_coeficientes):
+                    derivada = derivada * x + derivadas[i, j]
+                integrando[i, k] = np.sqrt(1.0 + derivada * derivada)
+        return integrando
+
+# ----- Núcleos públicos -----
+
+def pesos_simpson(n):
+    """
+    Construye el vector de pesos de Simpson 1/3 compuesto para n subintervalos.
+
+    Args:
+        n: numero de subintervalos (par)
+
+    Returns:
+        Arreglo de n + 1 pesos
+    """
+    pesos = np.ones(n + 1)
+    pesos[1:n:2] = 4
+    pesos[2:n:2] = 2
+    return pesos
+
+def suma_simpson(valores, h):
+    """
+    Aplica los pesos 1-4-2-4-...-4-1 de Simpson 1/3 a los valores ya evaluados.
+
+    Args:
+        valores: arreglo con f evaluada en los n + 1 nodos (n par)
+        h: tamaño de cada subintervalo
+
+    Returns:
+        Aproximación de la integral
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    return (h / 3) * np.dot(pesos_simpson(len(valores) - 1), valores)
+
+def longitud_poligonal(x, y):
+    """
+    Suma las longitudes √(dx² + dy²) de los segmentos de una poligonal.
+
+    Args:
+        x: coordenadas x de los vértices
+        y: coordenadas y de los vértices
+
+    Returns:
+        Longitud total de la poligonal
+    """
+    return np.sum(np.hypot(np.diff(x), np.diff(y)))
+
+def longitudes_polinomios(derivadas, a, ancho, u, w):
+    """
+    Integra sqrt(1 + p'(x)^2) de varios polinomios con la misma regla de cuadratura.
+
+    Args:
+        derivadas: arreglo (m, g) con los coeficientes de cada derivada p',
+                   grado mayor primero
+        a: arreglo (m,) con el extremo izquierdo de cada intervalo
+        ancho: arreglo (m,) con el ancho de cada intervalo
+        u: nodos de la regla en [0, 1]
+        w: pesos de la regla en [0, 1]
+
+    Returns:
+        Arreglo con las m longitudes de arco, idéntico con los dos backends;
+        con el backend 'auto' los lotes pequeños (menos de
+        MIN_EVALUACIONES_NUMBA evaluaciones) usan NumPy
+    """
+    derivadas = np.ascontiguousarray(derivadas, dtype=np.float64)
+    a = np.ascontiguousarray(a, dtype=np.float64)
+    ancho = np.ascontiguousarray(ancho, dtype=np.float64)
+    u = np.ascontiguousarray(u, dtype=np.float64)
+    w = np.ascontiguousarray(w, dtype=np.float64)
+    backend = backend_activo()
+    if _backend_solicitado == 'auto' and derivadas.shape[0] * u.shape[0] < MIN_EVALUACIONES_NUMBA:
+        backend = 'numpy'
+    _ultimo_backend['longitudes_polinomios'] = backend
+
+    if backend == 'numba':
+        integrando = _integrando_polinomios_numba(derivadas, a, ancho, u)
+    else:
+        integrando = _integrando_polinomios_numpy(derivadas, a, ancho, u)
+
+    # la suma con los pesos es la misma en los dos backends
+    return ancho * (integrando @ w)
@@ -1,5 +1,14 @@
+import time
 import numpy as np
-from scipy import interpolate
+from math import comb
+from scipy import interpolate, linalg, optimize
+
+try:
+    from src.modelos import ModeloPolinomio, ModeloSpline, ModeloCatenaria, ModeloPorTramos
+    from src.calculos_numericos import longitudes_lote
+except ImportError:
+    from modelos import ModeloPolinomio, ModeloSpline, ModeloCatenaria, ModeloPorTramos
+    from calculos_numericos import longitudes_lote
 
 # definimos la funcion de ajuste de polinomios
 def ajuste_polinomio(puntos, grado=3):
@@ -11,72 +20,898 @@ def ajuste_polinomio(puntos, grado=3):
             grado: grado del polinomio a ajustar
            
         Returns:
-            una funcion que evalua el polinomio ajustado
+            ModeloPolinomio con el polinomio ajustado (atributo coeficientes)
     """
     x = puntos[:,0]
     y = puntos[:,1]
    
     # ajustar el polinomio
     coeficientes = np.polyfit(x, y, grado)
+    return crear_funcion_polinomio(coeficientes, np.min(x), np.max(x))
+
+# creamos la funcion evaluable de unos coeficientes ya ajustados
+def crear_funcion_polinomio(coeficientes, x_min=-np.inf, x_max=np.inf):
+    """
+      Crea el modelo que evalua un polinomio a partir de sus coeficientes.
+     
+        Args:
+            coeficientes: coeficientes en el orden de np.polyfit
+            x_min, x_max: intervalo en el que se ajusto el polinomio
+           
+        Returns:
+            ModeloPolinomio (atributo coeficientes)
+    """
+    return ModeloPolinomio(coeficientes, x_min, x_max)
+
+# pasamos coeficientes de la variable escalada t = (x - centro)/escala a x
+def _coeficientes_en_x(coeficientes_t, centros, escalas):
+    """
+      Convierte por lotes los coeficientes de p(t), t = (x - centro)/escala,
+      en coeficientes del mismo polinomio en x (orden de np.polyfit).
+     
+        Args:
+            coeficientes_t: array (segmentos, grado + 1), grado mayor primero
+            centros: array (segmentos,) con el centro de cada segmento
+            escalas: array (segmentos,) con la escala de cada segmento
+           
+        Returns:
+            array (segmentos, grado + 1) con los coeficientes en x
+    """
+    grado = coeficientes_t.shape[1] - 1
+   
+    # a[:, m] es el coeficiente de t^m
+    a = coeficientes_t[:, ::-1]
+   
+    # (x - c)^m / s^m = sum_j comb(m, j) x^j (-c)^(m - j) / s^m
+    m = np.arange(grado + 1)
+    binomiales = np.array([[comb(mi, j) for j in m] for mi in m], dtype=float)
+    exponentes = np.clip(m[:, None] - m[None, :], 0, None)
+    potencias_c = (-centros)[:, None, None] ** exponentes[None, :, :]
+    factores = binomiales[None, :, :] * potencias_c / escalas[:, None, None] ** m[None, :, None]
+   
+    # b[:, j] es el coeficiente de x^j
+    b = np.einsum('sm,smj->sj', a, factores)
+    return b[:, ::-1]
+
+# ajustamos muchos segmentos y grados con minimos cuadrados por lotes
+def ajuste_polinomios_lote(segmentos, grados=(3,)):
+    """
+      Ajusta por minimos cuadrados un polinomio de cada grado a cada segmento
+      de puntos, resolviendo los segmentos por lotes con factorizaciones QR.
+     
+      Cada segmento se escala a t en [-1, 1] y la matriz de diseño se
+      construye una sola vez, sin relleno, para el grado mayor con columnas
+      1, t, t^2, ...; las primeras g + 1 columnas son las del grado g, asi
+      que la QR del grado mayor sirve para todos (V[:, :g+1] = Q[:, :g+1]
+      R[:g+1, :g+1]). Para factorizar por lotes los segmentos se agrupan por
+      tamaño (potencias de dos) y solo se rellenan con filas nulas hasta el
+      tamaño de su grupo, de modo que la memoria y el tiempo crecen con el
+      numero total de puntos y no con segmentos x segmento mayor.
+     
+        Args:
+            segmentos: lista de arrays de puntos (x,y), uno por segmento
+            grados: grados de polinomio a ajustar en todos los segmentos
+           
+        Returns:
+            diccionario grado -> diccionario con 'coeficientes' (segmentos,
+            grado + 1) en el orden de np.polyfit, 'residuos' (suma de
+            cuadrados), 'condicion' (numero de condicion de la matriz de
+            diseño escalada) y 'rango_completo' (False si el segmento tiene
+            menos abscisas distintas que coeficientes; en ese caso se usa
+            la solucion de norma minima). Los segmentos sin puntos tienen
+            coeficientes NaN, residuos 0 y condicion infinita
+    """
+    num_segmentos = len(segmentos)
+    tamanos = np.array([len(seg) for seg in segmentos], dtype=int)
+    vacios = tamanos == 0
+    no_vacios = np.flatnonzero(~vacios)
+    inicios = np.cumsum(tamanos) - tamanos
+    k = max(grados) + 1
+   
+    # todos los puntos seguidos, sin relleno, y el segmento de cada uno
+    puntos = np.concatenate([np.asarray(seg, dtype=float).reshape(-1, 2) for seg in segmentos]
+                            + [np.empty((0, 2))])
+    x = puntos[:, 0]
+    y = puntos[:, 1]
+    ids = np.repeat(np.arange(num_segmentos), tamanos)
+   
+    # escalado de cada segmento a [-1, 1] (los vacios quedan en [0, 0])
+    x_min = np.zeros(num_segmentos)
+    x_max = np.zeros(num_segmentos)
+    if len(no_vacios):
+        x_min[no_vacios] = np.minimum.reduceat(x, inicios[no_vacios])
+        x_max[no_vacios] = np.maximum.reduceat(x, inicios[no_vacios])
+    centros = (x_min + x_max) / 2
+    escalas = np.where(x_max > x_min, (x_max - x_min) / 2, 1.0)
+    t = (x - centros[ids]) / escalas[ids]
+   
+    # matriz de diseño del grado mayor en potencias crecientes, una sola vez
+    V = t[:, None] ** np.arange(k)[None, :]
+   
+    coeficientes_t = {g: np.full((num_segmentos, g + 1), np.nan) for g in grados}
+    condicion = {g: np.full(num_segmentos, np.inf) for g in grados}
+    rango_completo = {g: np.zeros(num_segmentos, dtype=bool) for g in grados}
+   
+    # grupos de segmentos de tamaño parecido: se rellenan como mucho al doble
+    capacidad = np.maximum(k, 2 ** np.ceil(np.log2(np.maximum(tamanos, 1))).astype(int))
+    for tamano_grupo in np.unique(capacidad[no_vacios]):
+        grupo = no_vacios[capacidad[no_vacios] == tamano_grupo]
+        validas = np.arange(tamano_grupo)[None, :] < tamanos[grupo, None]
+        filas = np.where(validas, inicios[grupo, None] + np.arange(tamano_grupo)[None, :], 0)
+        V_grupo = V[filas] * validas[:, :, None]
+        Y_grupo = y[filas] * validas
+       
+        # una QR por lotes para todos los grados; R tiene los mismos valores singulares que V
+        Q, R = np.linalg.qr(V_grupo)
+        QtY = (np.swapaxes(Q, 1, 2) @ Y_grupo[..., None])[..., 0]
+       
+        for g in grados:
+            R_g = R[:, :g + 1, :g + 1]
+            valores_singulares = np.linalg.svd(R_g, compute_uv=False)
+            completo = valores_singulares[:, -1] > 1e-10 * valores_singulares[:, 0]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                condicion[g][grupo] = np.where(valores_singulares[:, -1] > 0,
+                                               valores_singulares[:, 0] / valores_singulares[:, -1], np.inf)
+            rango_completo[g][grupo] = completo
+           
+            # los segmentos sin rango completo se resuelven aparte
+            R_g = R_g.copy()
+            R_g[~completo] = np.eye(g + 1)
+            solucion = np.linalg.solve(R_g, QtY[:, :g + 1, None])[..., 0]
+            for i in np.flatnonzero(~completo):
+                n_i = tamanos[grupo[i]]
+                solucion[i] = np.linalg.lstsq(V_grupo[i, :n_i, :g + 1], Y_grupo[i, :n_i], rcond=None)[0]
+            coeficientes_t[g][grupo] = solucion
+   
+    resultados = {}
+    for g in grados:
+        # residuos sobre los puntos reales, sin relleno
+        ajustado = np.sum(V[:, :g + 1] * coeficientes_t[g][ids], axis=1)
+        residuos = np.bincount(ids, weights=(ajustado - y)**2, minlength=num_segmentos)
+       
+        coeficientes = _coeficientes_en_x(coeficientes_t[g][:, ::-1], centros, escalas)
+        coeficientes[vacios] = np.nan
+       
+        resultados[g] = {
+            'coeficientes': coeficientes,
+            'residuos': residuos,
+            'condicion': condicion[g],
+            'rango_completo': rango_completo[g]
+        }
+   
+    return resultados
+
+# ajustamos un polinomio distinto en cada intervalo de x
+def ajuste_por_intervalos(puntos, num_intervalos=5, grado=3, x_min=None, x_max=None,
+                          continuidad=None):
+    """
+      Divide [x_min, x_max] en intervalos iguales y ajusta un polinomio en
+      cada uno.
+     
+      Los puntos se ordenan una sola vez y los extremos de cada intervalo se
+      localizan con np.searchsorted, de modo que cada intervalo es un tramo
+      contiguo del array ordenado (los puntos de un extremo comun pertenecen
+      a los dos intervalos). Los intervalos con menos de grado + 1 puntos
+      usan un grado menor y, si tienen menos de dos, los grado + 1 puntos mas
+      cercanos. Todos los intervalos se ajustan con ajuste_polinomios_lote.
+     
+        Args:
+            puntos: array de puntos (x,y) a ajustar
+            num_intervalos: numero de intervalos
+            grado: grado del polinomio de cada intervalo
+            x_min, x_max: extremos del rango; por defecto los de los puntos
+            continuidad: None para ajustes independientes, o el orden de
+                derivada (0 a grado - 1) que debe ser continua en las uniones;
+                en ese caso se ajusta un spline de minimos cuadrados con nudos
+                en las uniones y todos los intervalos tienen el mismo grado
+           
+        Returns:
+            diccionario con 'modelo' (ModeloPorTramos), 'limites' (extremos de
+            los intervalos), 'coeficientes' (lista con los coeficientes de cada
+            intervalo en el orden de np.polyfit), 'grados' y 'num_puntos'
+            (puntos dentro de cada intervalo)
+    """
+    puntos = np.asarray(puntos, dtype=float)
+    if len(puntos) < 2:
+        raise ValueError("Se necesitan al menos 2 puntos para ajustar por intervalos")
+    if continuidad is not None and not 0 <= continuidad < grado:
+        raise ValueError(f"La continuidad debe estar entre 0 y {grado - 1}")
+   
+    # ordenar una sola vez por x
+    orden = np.argsort(puntos[:, 0], kind='stable')
+    xs = puntos[orden, 0]
+    ys = puntos[orden, 1]
+    x_min = xs[0] if x_min is None else x_min
+    x_max = xs[-1] if x_max is None else x_max
+   
+    # tramo [inicios[i], finales[i]) del array ordenado de cada intervalo
+    limites = np.linspace(x_min, x_max, num_intervalos + 1)
+    inicios = np.searchsorted(xs, limites[:-1], side='left')
+    finales = np.searchsorted(xs, limites[1:], side='right')
+    num_puntos = finales - inicios
+   
+    if continuidad is not None:
+        try:
+            coeficientes = _ajuste_por_intervalos_continuo(xs, ys, limites, grado, continuidad)
+            grados = np.full(num_intervalos, grado)
+            return {
+                'modelo': ModeloPorTramos(limites, coeficientes),
+                'limites': limites,
+                'coeficientes': list(coeficientes),
+                'grados': grados,
+                'num_puntos': num_puntos
+            }
+        except (ValueError, np.linalg.LinAlgError) as e:
+            print(f"Advertencia: No se pudo imponer la continuidad ({e}). Ajustando cada intervalo por separado.")
+   
+    segmentos = []
+    grados = np.empty(num_intervalos, dtype=int)
+    for i in range(num_intervalos):
+        inicio, fin = inicios[i], finales[i]
+        n = fin - inicio
+        grados[i] = grado if n > grado else min(n - 1, grado - 1)
+       
+        if grados[i] < 1:
+            # ampliar el tramo hacia el vecino mas cercano hasta tener grado + 1 puntos
+            while fin - inicio < min(grado + 1, len(xs)):
+                if inicio == 0:
+                    fin += 1
+                elif fin == len(xs) or limites[i] - xs[inicio - 1] <= xs[fin] - limites[i + 1]:
+                    inicio -= 1
+                else:
+                    fin += 1
+            grados[i] = min(fin - inicio - 1, grado)
+       
+        segmentos.append(np.column_stack((xs[inicio:fin], ys[inicio:fin])))
+   
+    # un ajuste por lotes por cada grado distinto
+    coeficientes = [None] * num_intervalos
+    for g in np.unique(grados):
+        indices = np.flatnonzero(grados == g)
+        ajuste = ajuste_polinomios_lote([segmentos[i] for i in indices], (int(g),))[int(g)]
+        for j, i in enumerate(indices):
+            coeficientes[i] = ajuste['coeficientes'][j]
+   
+    return {
+        'modelo': ModeloPorTramos(limites, coeficientes),
+        'limites': limites,
+        'coeficientes': coeficientes,
+        'grados': grados,
+        'num_puntos': num_puntos
+    }
+
+# ajuste por intervalos con derivadas continuas en las uniones
+def _ajuste_por_intervalos_continuo(xs, ys, limites, grado, continuidad):
+    """
+      Ajusta un spline de minimos cuadrados con nudos en las uniones de los
+      intervalos y lo devuelve como un polinomio por intervalo.
+     
+        Args:
+            xs, ys: puntos ordenados por x
+            limites: extremos de los intervalos
+            grado: grado del spline
+            continuidad: orden de derivada continua en las uniones
+           
+        Returns:
+            array (intervalos, grado + 1) con los coeficientes de cada
+            intervalo en el orden de np.polyfit
+    """
+    dentro = (xs >= limites[0]) & (xs <= limites[-1])
+   
+    # cada nudo interior repetido grado - continuidad veces da derivadas continuas hasta ese orden
+    interiores = np.repeat(limites[1:-1], grado - continuidad)
+    nudos = np.concatenate(([limites[0]] * (grado + 1), interiores, [limites[-1]] * (grado + 1)))
+    spline = interpolate.make_lsq_spline(xs[dentro], ys[dentro], nudos, k=grado)
+    if not np.all(np.isfinite(spline.c)):
+        raise ValueError("hay intervalos sin puntos suficientes")
+   
+    # coeficientes locales en (x - limites[i]) de cada intervalo
+    tramos = interpolate.PPoly.from_spline(spline)
+    locales = tramos.c[:, tramos.x[1:] > tramos.x[:-1]].T
+    return _coeficientes_en_x(locales, limites[:-1], np.ones(len(limites) - 1))
+
+# ajustamos los tramos [izquierdas[i], derechas[i]] de unos puntos ordenados
+def _ajustar_tramos(xs, ys, izquierdas, derechas, grado, muestras_giro=17):
+    """
+      Ajusta por lotes un polinomio a cada tramo y mide su error y su giro.
+     
+        Args:
+            xs, ys: puntos ordenados por x
+            izquierdas, derechas: extremos de cada tramo (cerrados)
+            grado: grado de los polinomios
+            muestras_giro: puntos en los que se evalua la pendiente
+           
+        Returns:
+            tupla (coeficientes, rms, num_puntos, giro): coeficientes en el
+            orden de np.polyfit, raiz del error cuadratico medio, puntos de
+            cada tramo y angulo total girado por la tangente (radianes)
+    """
+    inicios = np.searchsorted(xs, izquierdas, side='left')
+    finales = np.searchsorted(xs, derechas, side='right')
+    num_puntos = finales - inicios
+   
+    segmentos = [np.column_stack((xs[i:f], ys[i:f])) for i, f in zip(inicios, finales)]
+    ajuste = ajuste_polinomios_lote(segmentos, (grado,))[grado]
+    coeficientes = ajuste['coeficientes']
+    rms = np.sqrt(ajuste['residuos'] / np.maximum(num_puntos, 1))
+   
+    # giro de la tangente: suma de |d arctan(p'(x))| sobre una malla de cada tramo
+    derivadas = coeficientes[:, :-1] * np.arange(grado, 0, -1)[None, :]
+    x = izquierdas[:, None] + (derechas - izquierdas)[:, None] * np.linspace(0, 1, muestras_giro)[None, :]
+    pendientes = np.zeros_like(x)
+    for j in range(derivadas.shape[1]):
+        pendientes = pendientes * x + derivadas[:, j:j + 1]
+    giro = np.sum(np.abs(np.diff(np.arctan(pendientes), axis=1)), axis=1)
+   
+    return coeficientes, rms, num_puntos, giro
+
+# dividimos solo los intervalos que no cumplen la tolerancia
+def ajuste_por_intervalos_adaptativo(puntos, tolerancia=1.0, grado=3, max_segmentos=50,
+                                     giro_max=None, min_puntos=None, fusionar=True):
+    """
+      Ajusta un polinomio por intervalo eligiendo los intervalos segun la curva:
+      se empieza con un solo intervalo y en cada ronda se parten por la mitad
+      los que superan la tolerancia (todos los nuevos se ajustan juntos por
+      lotes), hasta cumplirla o agotar el presupuesto de segmentos. Despues se
+      fusionan los vecinos cuyo ajuste conjunto sigue cumpliendola, para
+      quedarse con los menos segmentos posibles.
+     
+        Args:
+            puntos: array de puntos (x,y) a ajustar
+            tolerancia: raiz del error cuadratico medio maxima de cada segmento
+            grado: grado del polinomio de cada segmento
+            max_segmentos: numero maximo de segmentos
+            giro_max: angulo maximo (radianes) que puede girar la tangente en
+                un segmento; None no limita la curvatura
+            min_puntos: puntos minimos de un segmento para poder partirlo en
+                dos; por defecto 2 * (grado + 1)
+            fusionar: si es True fusiona segmentos vecinos al final
+           
+        Returns:
+            diccionario con 'modelo' (ModeloPorTramos), 'limites',
+            'coeficientes', 'errores' (rms de cada segmento), 'num_puntos',
+            'longitudes' (de cada segmento), 'longitud_total' y
+            'cumple_tolerancia' (False si se agoto el presupuesto o algun
+            segmento no se podia partir mas)
+    """
+    puntos = np.asarray(puntos, dtype=float)
+    orden = np.argsort(puntos[:, 0], kind='stable')
+    xs = puntos[orden, 0]
+    ys = puntos[orden, 1]
+    if len(xs) < grado + 1:
+        raise ValueError(f"Se necesitan al menos {grado + 1} puntos para ajustar grado {grado}")
+    if min_puntos is None:
+        min_puntos = 2 * (grado + 1)
+    giro_max = np.inf if giro_max is None else giro_max
+   
+    def incumple(rms, giro):
+        return (rms > tolerancia) | (giro > giro_max)
+   
+    # ronda inicial: un solo segmento con todos los puntos
+    limites = np.array([xs[0], xs[-1]])
+    coeficientes, rms, num_puntos, giro = _ajustar_tramos(xs, ys, limites[:-1], limites[1:], grado)
+    divisibles = num_puntos >= min_puntos
+   
+    while len(limites) - 1 < max_segmentos:
+        # candidatos: incumplen y tienen puntos para dos mitades ajustables
+        candidatos = np.flatnonzero(incumple(rms, giro) & divisibles)
+        if len(candidatos) == 0:
+            break
+       
+        # con poco presupuesto se parten primero los de mayor error
+        disponibles = max_segmentos - (len(limites) - 1)
+        if len(candidatos) > disponibles:
+            candidatos = np.sort(candidatos[np.argsort(-rms[candidatos], kind='stable')[:disponibles]])
+       
+        # ajustar las dos mitades de todos los candidatos en un solo lote
+        medios = (limites[candidatos] + limites[candidatos + 1]) / 2
+        izquierdas = np.concatenate((limites[candidatos], medios))
+        derechas = np.concatenate((medios, limites[candidatos + 1]))
+        nuevos = _ajustar_tramos(xs, ys, izquierdas, derechas, grado)
+       
+        # no partir los segmentos con alguna mitad sin puntos suficientes
+        validos = np.minimum(nuevos[2][:len(candidatos)], nuevos[2][len(candidatos):]) >= grado + 1
+        divisibles[candidatos[~validos]] = False
+        if not np.any(validos):
+            continue
+       
+        # insertar las mitades y reordenar todos los segmentos por su extremo izquierdo
+        quedan = np.ones(len(limites) - 1, dtype=bool)
+        quedan[candidatos[validos]] = False
+        seleccion = np.concatenate((validos, validos))
+        izquierdas = np.concatenate((limites[:-1][quedan], izquierdas[seleccion]))
+        orden_tramos = np.argsort(izquierdas, kind='stable')
+        limites = np.append(izquierdas[orden_tramos], limites[-1])
+        coeficientes, rms, num_puntos, giro = (
+            np.concatenate((actual[quedan], nuevo[seleccion]))[orden_tramos]
+            for actual, nuevo in zip((coeficientes, rms, num_puntos, giro), nuevos)
+        )
+        divisibles = np.concatenate((divisibles[quedan], nuevos[2][seleccion] >= min_puntos))[orden_tramos]
+   
+    # fusionar vecinos mientras el ajuste conjunto cumpla la tolerancia
+    while fusionar and len(limites) > 2:
+        pares = _ajustar_tramos(xs, ys, limites[:-2], limites[2:], grado)
+        admisibles = np.flatnonzero(~incumple(pares[1], pares[3]))
+        if len(admisibles) == 0:
+            break
+        i = admisibles[np.argmin(pares[1][admisibles])]
+        limites = np.delete(limites, i + 1)
+        coeficientes, rms, num_puntos, giro = (
+            np.concatenate((actual[:i], nuevo[i:i + 1], actual[i + 2:]))
+            for actual, nuevo in zip((coeficientes, rms, num_puntos, giro), pares)
+        )
+   
+    longitudes = longitudes_lote(coeficientes, np.column_stack((limites[:-1], limites[1:])))
+   
+    return {
+        'modelo': ModeloPorTramos(limites, coeficientes),
+        'limites': limites,
+        'coeficientes': list(coeficientes),
+        'errores': rms,
+        'num_puntos': num_puntos,
+        'longitudes': longitudes,
+        'longitud_total': np.sum(longitudes),
+        'cumple_tolerancia': not np.any(incumple(rms, giro))
+    }
+
+# barremos varios grados con una sola factorizacion
+def barrido_grados(puntos, grados=(2, 3, 4, 5), criterio='bic'):
+    """
+      Ajusta polinomios de varios grados a los mismos puntos factorizando una
+      sola vez la matriz de Vandermonde del grado mayor.
+     
+      Con columnas en potencias crecientes 1, t, t^2, ... las primeras g + 1
+      columnas de V = QR generan los polinomios de grado g, asi que su ajuste
+      es R[:g+1, :g+1] c = (Q^T y)[:g+1] y su suma de residuos al cuadrado es
+      la del grado mayor mas la suma de (Q^T y)[g+1:]^2.
+     
+        Args:
+            puntos: array de puntos (x,y) a ajustar
+            grados: grados de polinomio a comparar
+            criterio: 'aic' o 'bic', criterio para elegir el mejor grado
+           
+        Returns:
+            diccionario con 'grados', 'coeficientes' (grado -> coeficientes en
+            el orden de np.polyfit), 'residuos', 'aic' y 'bic' (grado -> valor),
+            'mejor_grado' y 'funcion' (el polinomio del mejor grado)
+    """
+    if criterio not in ('aic', 'bic'):
+        raise ValueError(f"Criterio no reconocido: {criterio}")
+   
+    x = np.asarray(puntos[:,0], dtype=float)
+    y = np.asarray(puntos[:,1], dtype=float)
+    n = len(x)
+    grados = sorted(grados)
+    grado_max = grados[-1]
+   
+    if n <= grado_max:
+        raise ValueError(f"Se necesitan mas de {grado_max} puntos para ajustar grado {grado_max}")
+   
+    # escalado a [-1, 1] para que la matriz de Vandermonde este bien condicionada
+    centro = (x.min() + x.max()) / 2
+    escala = (x.max() - x.min()) / 2 if x.max() > x.min() else 1.0
+    t = (x - centro) / escala
+   
+    # una sola factorizacion QR del grado mayor
+    Q, R = np.linalg.qr(np.vander(t, grado_max + 1, increasing=True))
+    qty = Q.T @ y
+    residuo_max = y - Q @ qty
+    rss_max = residuo_max @ residuo_max
+   
+    coeficientes = {}
+    residuos = {}
+    aic = {}
+    bic = {}
+    for grado in grados:
+        k = grado + 1
+        c_t = np.linalg.solve(R[:k, :k], qty[:k])
+        coeficientes[grado] = _coeficientes_en_x(c_t[None, ::-1], np.array([centro]),
+                                                 np.array([escala]))[0]
+        residuos[grado] = rss_max + np.sum(qty[k:]**2)
+       
+        # criterios de informacion con error gaussiano
+        log_verosimilitud = n * np.log(max(residuos[grado], np.finfo(float).tiny) / n)
+        aic[grado] = log_verosimilitud + 2 * k
+        bic[grado] = log_verosimilitud + k * np.log(n)
    
-    # creamos una funcion que evalue el polinomio
-    def funcion_ajustada(x_val):
-        return np.polyval(coeficientes, x_val)
-    return funcion_ajustada
+    puntuaciones = aic if criterio == 'aic' else bic
+    mejor_grado = min(grados, key=puntuaciones.get)
+   
+    return {
+        'grados': grados,
+        'coeficientes': coeficientes,
+        'residuos': residuos,
+        'aic': aic,
+        'bic': bic,
+        'mejor_grado': mejor_grado,
+        'funcion': crear_funcion_polinomio(coeficientes[mejor_grado], x.min(), x.max())
+    }
+
+# ajustamos un polinomio ignorando los puntos atipicos
+def ajuste_polinomio_robusto(puntos, grado=3, metodo='ransac', umbral=None, max_iter=1000,
+                             tiempo_max=None, confianza=0.99, semilla=None):
+    """
+      Ajusta un polinomio resistente a puntos atipicos (pixeles de borde
+      sueltos, sombras o fondo) e indica que puntos se consideran validos.
+     
+      'ransac' prueba lotes de hipotesis a partir de subconjuntos minimos de
+      grado + 1 puntos y puntua todas las del lote a la vez con la perdida
+      truncada de MSAC; el numero de hipotesis se adapta a la proporcion de
+      puntos validos encontrada. 'huber' usa minimos cuadrados reponderados
+      con la perdida de Huber y una escala robusta (MAD). En ambos casos el
+      polinomio final se reajusta por minimos cuadrados con los puntos validos.
+     
+        Args:
+            puntos: array de puntos (x,y) a ajustar
+            grado: grado del polinomio a ajustar
+            metodo: 'ransac' o 'huber'
+            umbral: distancia vertical maxima de un punto valido; por defecto
+                3 pixeles en 'ransac' y 3 veces la escala robusta en 'huber'
+            max_iter: maximo de hipotesis (ransac) o de iteraciones (huber)
+            tiempo_max: tiempo maximo en segundos (None = sin limite)
+            confianza: probabilidad de haber probado una muestra sin atipicos (ransac)
+            semilla: semilla del generador aleatorio (ransac)
+           
+        Returns:
+            diccionario con 'modelo' (ModeloPolinomio), 'inliers' (mascara de
+            puntos validos), 'iteraciones', 'convergio' (False si se agoto
+            algun limite antes de terminar), 'escala' (desviacion robusta de
+            los residuos validos) y 'metodo'
+    """
+    if metodo not in ('ransac', 'huber'):
+        raise ValueError(f"Metodo no reconocido: {metodo}")
+   
+    inicio = time.perf_counter()
+    x = np.asarray(puntos[:,0], dtype=float)
+    y = np.asarray(puntos[:,1], dtype=float)
+    n = len(x)
+    k = grado + 1
+    if n < k:
+        raise ValueError(f"Se necesitan al menos {k} puntos para ajustar grado {grado}")
+   
+    # escalado a [-1, 1] para que la matriz de Vandermonde este bien condicionada
+    centro = (x.min() + x.max()) / 2
+    escala_x = (x.max() - x.min()) / 2 if x.max() > x.min() else 1.0
+    V = np.vander((x - centro) / escala_x, k)
+   
+    def tiempo_agotado():
+        return tiempo_max is not None and time.perf_counter() - inicio > tiempo_max
+   
+    if metodo == 'ransac':
+        umbral = 3.0 if umbral is None else umbral
+        generador = np.random.default_rng(semilla)
+        tamano_lote = 64
+        necesarias = max_iter
+        mejor_coste = np.inf
+        mejores_coeficientes = None
+        iteraciones = 0
+       
+        while iteraciones < min(necesarias, max_iter) and not tiempo_agotado():
+            # lote de muestras minimas sin repeticion dentro de cada muestra
+            lote = min(tamano_lote, max_iter - iteraciones)
+            muestras = np.argsort(generador.random((lote, n)), axis=1)[:, :k] if n <= 4 * k \
+                else generador.integers(0, n, size=(lote, k))
+            iteraciones += lote
+           
+            # descartar muestras con abscisas repetidas (sistema singular)
+            t_muestras = np.sort(V[muestras, -2], axis=1)
+            validas = np.all(np.diff(t_muestras, axis=1) > 1e-9, axis=1) if k > 1 else np.ones(lote, bool)
+            if not np.any(validas):
+                continue
+            muestras = muestras[validas]
+           
+            # todas las hipotesis del lote y sus residuos de una vez
+            coeficientes = np.linalg.solve(V[muestras], y[muestras][..., None])[..., 0]
+            residuos = np.abs(y[:, None] - V @ coeficientes.T)
+            costes = np.sum(np.minimum(residuos, umbral)**2, axis=0)
+           
+            j = int(np.argmin(costes))
+            if costes[j] < mejor_coste:
+                mejor_coste = costes[j]
+                mejores_coeficientes = coeficientes[j]
+               
+                # hipotesis necesarias segun la proporcion de puntos validos
+                proporcion = np.mean(residuos[:, j] <= umbral)
+                if proporcion >= 1:
+                    necesarias = iteraciones
+                elif proporcion > 0:
+                    # con proporcion**k despreciable el denominador es 0: harian falta
+                    # infinitas hipotesis; se acota a max_iter + 1 (no converge)
+                    denominador = np.log1p(-proporcion**k)
+                    necesarias = max_iter + 1
+                    if denominador < 0:
+                        necesarias = int(min(np.ceil(np.log(1 - confianza) / denominador), max_iter + 1))
+       
+        if mejores_coeficientes is None:
+            mejores_coeficientes = np.linalg.lstsq(V, y, rcond=None)[0]
+        convergio = iteraciones >= min(necesarias, max_iter) and necesarias <= max_iter
+        inliers = np.abs(y - V @ mejores_coeficientes) <= umbral
+       
+    else:
+        # minimos cuadrados reponderados con la perdida de Huber
+        c_huber = 1.345
+        coeficientes = np.linalg.lstsq(V, y, rcond=None)[0]
+        convergio = False
+        iteraciones = 0
+        escala = 0.0
+       
+        while iteraciones < max_iter and not tiempo_agotado():
+            iteraciones += 1
+            residuos = y - V @ coeficientes
+            escala = 1.4826 * np.median(np.abs(residuos - np.median(residuos)))
+            if escala <= 0:
+                convergio = True
+                break
+           
+            u = np.abs(residuos) / (c_huber * escala)
+            raiz_pesos = np.sqrt(np.where(u <= 1, 1.0, 1 / np.maximum(u, 1e-12)))
+            nuevos = np.linalg.lstsq(V * raiz_pesos[:, None], y * raiz_pesos, rcond=None)[0]
+           
+            cambio = np.max(np.abs(nuevos - coeficientes))
+            coeficientes = nuevos
+            if cambio <= 1e-8 * (1 + np.max(np.abs(coeficientes))):
+                convergio = True
+                break
+       
+        residuos = np.abs(y - V @ coeficientes)
+        if umbral is None:
+            umbral = 3 * escala if escala > 0 else np.finfo(float).eps
+        inliers = residuos <= umbral
+   
+    # reajuste final por minimos cuadrados con los puntos validos, hasta que no cambien
+    coeficientes_t = mejores_coeficientes if metodo == 'ransac' else coeficientes
+    for _ in range(10):
+        if np.count_nonzero(inliers) < k:
+            break
+        coeficientes_t = np.linalg.lstsq(V[inliers], y[inliers], rcond=None)[0]
+        nuevos_inliers = np.abs(y - V @ coeficientes_t) <= umbral
+        if np.array_equal(nuevos_inliers, inliers):
+            break
+        inliers = nuevos_inliers
+   
+    residuos_validos = (y - V @ coeficientes_t)[inliers]
+    escala = 1.4826 * np.median(np.abs(residuos_validos)) if len(residuos_validos) else np.nan
+    coeficientes_x = _coeficientes_en_x(coeficientes_t[None, :], np.array([centro]), np.array([escala_x]))[0]
+   
+    return {
+        'modelo': crear_funcion_polinomio(coeficientes_x, x.min(), x.max()),
+        'inliers': inliers,
+        'iteraciones': iteraciones,
+        'convergio': convergio,
+        'escala': escala,
+        'metodo': metodo
+    }
+
+# definimos la funcion de ajuste de catenarias (cables colgantes)
+def ajuste_catenaria(puntos):
+    """
+      Ajusta una catenaria y = c + a*cosh((x - x0)/a) a los puntos dados.
+     
+        Args:
+            puntos: array de puntos (x,y) a ajustar
+           
+        Returns:
+            ModeloCatenaria con la catenaria ajustada (atributo
+            parametros_catenaria = (a, x0, c))
+    """
+    x = puntos[:,0]
+    y = puntos[:,1]
+   
+    # estimacion inicial a partir de la parabola y ~ c + a + (x - x0)^2 / (2a)
+    A, B, C = np.polyfit(x, y, 2)
+    if A == 0:
+        A = 1e-6
+    a0 = 1 / (2 * A)
+    x00 = -B / (2 * A)
+    c0 = np.polyval([A, B, C], x00) - a0
+   
+    def catenaria(x_val, a, x0, c):
+        return c + a * np.cosh((x_val - x0) / a)
+   
+    # ajustar los parametros por minimos cuadrados no lineales
+    (a, x0, c), _ = optimize.curve_fit(catenaria, x, y, p0=(a0, x00, c0), maxfev=10000)
+   
+    # el modelo expone parametros_catenaria para calcular la longitud en forma cerrada
+    return ModeloCatenaria(a, x0, c, np.min(x), np.max(x))
+
+# eliminamos las abscisas repetidas antes de ajustar un spline
+def eliminar_duplicados_x(x, y, estrategia='primero', epsilon=1e-10):
+    """
+      Ordena los puntos por x y agrupa los que tienen la misma abscisa
+      (diferencia menor o igual que epsilon con el punto anterior),
+      dejando un solo punto por grupo.
+     
+        Args:
+            x: coordenadas x de los puntos
+            y: coordenadas y de los puntos
+            estrategia: valor de y que se conserva en cada grupo:
+                'primero' (el primero en el orden original), 'media' o 'mediana'
+            epsilon: umbral para considerar distintas dos abscisas
+           
+        Returns:
+            tupla (x_unicos, y_unicos, info) donde info es un diccionario
+            con la estrategia, los puntos originales y los eliminados
+    """
+    if estrategia not in ('primero', 'media', 'mediana'):
+        raise ValueError(f"Estrategia de duplicados no reconocida: {estrategia}")
+   
+    # ordenamos por x conservando el orden original entre empates
+    orden = np.argsort(x, kind='stable')
+    x = np.asarray(x, dtype=float)[orden]
+    y = np.asarray(y, dtype=float)[orden]
+   
+    # cada grupo empieza donde x supera en mas de epsilon al punto anterior
+    inicios = np.flatnonzero(np.concatenate(([True], np.diff(x) > epsilon)))
+    conteos = np.diff(np.append(inicios, len(x)))
+    x_unicos = x[inicios]
+   
+    if estrategia == 'primero':
+        y_unicos = y[inicios]
+    elif estrategia == 'media':
+        y_unicos = np.add.reduceat(y, inicios) / conteos
+    else:
+        # ordenamos y dentro de cada grupo y tomamos el elemento central
+        grupo = np.repeat(np.arange(len(inicios)), conteos)
+        y_ordenada = y[np.lexsort((y, grupo))]
+        y_unicos = (y_ordenada[inicios + (conteos - 1) // 2] + y_ordenada[inicios + conteos // 2]) / 2
+   
+    info = {
+        'estrategia': estrategia,
+        'puntos_originales': len(x),
+        'puntos_eliminados': len(x) - len(x_unicos)
+    }
+    return x_unicos, y_unicos, info
 
 # definimos la función de ajuste de spline usando interpolación
-def ajuste_spline(puntos, s=0.1):
+def ajuste_spline(puntos, s=0.1, duplicados='primero'):
     """
       Ajusta un spline a los puntos dados.
      
         Args:
             puntos: array de puntos (x,y) a ajustar
             s: factor de suavizado (0 = interpolación exacta, >0 = aproximación)
+            duplicados: como resolver las abscisas repetidas: 'primero',
+                'media' o 'mediana' (ver eliminar_duplicados_x)
            
         Returns:
-            una funcion que evalua el spline ajustado
+            ModeloSpline con el spline ajustado; su atributo
+            info_deduplicacion indica la estrategia y los puntos eliminados
     """
-    # ordenamos los puntos por la coordenada x
-    puntos_ordenados = puntos[np.argsort(puntos[:,0])]
-    
-    # extraemos las coordenadas x e y
-    x = puntos_ordenados[:,0]  
-    y = puntos_ordenados[:,1]
-    
     # Procesamos los puntos para asegurar que x sea estrictamente creciente
-    x_procesado = []
-    y_procesado = []
-    
-    # Usamos un umbral para considerar puntos distintos
-    epsilon = 1e-10
-    ultimo_x = float('-inf')
-    
-    for i in range(len(x)):
-        # Si el punto actual es mayor que el último añadido (estrictamente creciente)
-        if x[i] > ultimo_x + epsilon:
-            x_procesado.append(x[i])
-            y_procesado.append(y[i])
-            ultimo_x = x[i]
-    
-    # Convertir a numpy arrays
-    x_procesado = np.array(x_procesado)
-    y_procesado = np.array(y_procesado)
+    x_procesado, y_procesado, info = eliminar_duplicados_x(puntos[:,0], puntos[:,1], duplicados)
     
     # Verificar que tengamos suficientes puntos para ajustar un spline
     if len(x_procesado) < 4:
         print("Advertencia: No hay suficientes puntos únicos para un spline cúbico. Usando interpolación lineal.")
-        return interpolate.interp1d(x_procesado, y_procesado, 
-                                  kind='linear', bounds_error=False, 
-                                  fill_value="extrapolate")
+        # B-spline lineal que pasa por los puntos (se extrapola con los tramos extremos)
+        nudos = np.concatenate(([x_procesado[0]], x_procesado, [x_procesado[-1]]))
+        return ModeloSpline((nudos, y_procesado, 1), info_deduplicacion=info)
     
     try:
         # Intentar ajustar un spline con el parámetro s proporcionado
         spline = interpolate.UnivariateSpline(x_procesado, y_procesado, s=s)
-        return spline
+        return ModeloSpline.desde_univariate(spline, info_deduplicacion=info)
     except Exception as e:
         print(f"Error al ajustar spline: {e}")
         print("Recurriendo a interpolación cúbica.")
         # Si falla, usar interpolación cúbica
-        return interpolate.interp1d(x_procesado, y_procesado, 
-                                  kind='cubic', bounds_error=False, 
-                                  fill_value="extrapolate")
\ No newline at end of file
+        spline = interpolate.make_interp_spline(x_procesado, y_procesado, k=3)
+        return ModeloSpline((spline.t, spline.c, spline.k), info_deduplicacion=info)
+
+# elegimos el suavizado del spline automaticamente
+def ajuste_spline_automatico(puntos, criterio='gcv', num_tramos=None, orden_penalizacion=2,
+                             lambdas=None, sigma=None, duplicados='primero'):
+    """
+      Ajusta un spline cubico penalizado (P-spline) eligiendo el suavizado
+      automaticamente, sin tener que adivinar el parametro s.
+     
+      Se usa una base B-spline con nudos equiespaciados y una penalizacion de
+      diferencias de los coeficientes con peso lambda. La matriz B^T B se
+      factoriza una sola vez (Cholesky) y se diagonaliza la penalizacion en esa
+      base (Demmler-Reinsch); con ello la suma de residuos y los grados de
+      libertad de cada lambda candidato cuestan O(numero de coeficientes).
+     
+        Args:
+            puntos: array de puntos (x,y) a ajustar
+            criterio: 'gcv' (validacion cruzada generalizada) o 'residuo'
+                (la suma de residuos igual a la esperada por el ruido)
+            num_tramos: tramos entre nudos; por defecto min(40, n // 4)
+            orden_penalizacion: orden de las diferencias penalizadas
+            lambdas: valores candidatos de lambda; por defecto una malla
+                logaritmica adaptada a la base
+            sigma: desviacion del ruido para criterio='residuo'; si es None
+                se estima con las segundas diferencias de y
+            duplicados: como resolver las abscisas repetidas (ver
+                eliminar_duplicados_x)
+           
+        Returns:
+            diccionario con 'modelo' (ModeloSpline elegido), 'lambda',
+            'criterio', la curva de puntuaciones ('lambdas', 'puntuaciones',
+            'grados_libertad') y 'suma_residuos' del ajuste elegido (el s
+            equivalente de ajuste_spline)
+    """
+    if criterio not in ('gcv', 'residuo'):
+        raise ValueError(f"Criterio no reconocido: {criterio}")
+   
+    x, y, info = eliminar_duplicados_x(puntos[:,0], puntos[:,1], duplicados)
+    n = len(x)
+    if n < 4 + orden_penalizacion:
+        print("Advertencia: Muy pocos puntos para elegir el suavizado. Usando ajuste_spline.")
+        return {'modelo': ajuste_spline(puntos, duplicados=duplicados), 'lambda': None,
+                'criterio': criterio, 'lambdas': np.array([]), 'puntuaciones': np.array([]),
+                'grados_libertad': np.array([]), 'suma_residuos': None}
+   
+    # base B-spline cubica con nudos equiespaciados
+    if num_tramos is None:
+        num_tramos = min(40, max(1, n // 4))
+    num_tramos = max(1, min(num_tramos, n - 3))
+    interiores = np.linspace(x[0], x[-1], num_tramos + 1)
+    nudos = np.concatenate(([x[0]] * 3, interiores, [x[-1]] * 3))
+    B = interpolate.BSpline.design_matrix(x, nudos, 3).toarray()
+    m = B.shape[1]
+   
+    # penalizacion de diferencias de los coeficientes
+    D = np.diff(np.eye(m), orden_penalizacion, axis=0)
+    P = D.T @ D
+   
+    # una sola factorizacion: B^T B = L L^T y L^-1 P L^-T = U diag(e) U^T
+    BtB = B.T @ B
+    L = linalg.cholesky(BtB + 1e-10 * np.trace(BtB) / m * np.eye(m), lower=True)
+    M = linalg.solve_triangular(L, linalg.solve_triangular(L, P, lower=True).T, lower=True)
+    e, U = linalg.eigh(M)
+    e = np.clip(e, 0, None)
+   
+    # G = B L^-T U tiene columnas ortonormales; z son los datos en esa base
+    LtU = linalg.solve_triangular(L.T, U, lower=False)
+    G = B @ LtU
+    z = G.T @ y
+    residuo_fuera = np.sum((y - G @ z)**2)
+   
+    # suma de residuos y grados de libertad para cada lambda
+    def evaluar(lam):
+        lam = np.atleast_1d(lam)
+        f = 1 / (1 + lam[:, None] * e[None, :])
+        rss = residuo_fuera + np.sum(((1 - f) * z[None, :])**2, axis=1)
+        return rss, f.sum(axis=1)
+   
+    if criterio == 'residuo' and sigma is None:
+        # ruido estimado con segundas diferencias: var(y[i+1] - 2y[i] + y[i-1]) = 6 sigma^2
+        sigma = np.sqrt(np.sum(np.diff(y, 2)**2) / (6 * (n - 2)))
+   
+    def puntuacion(lam):
+        rss, gl = evaluar(lam)
+        if criterio == 'gcv':
+            return n * rss / np.maximum(n - gl, 1e-12)**2
+        return np.abs(rss - (n - gl) * sigma**2)
+   
+    # malla de candidatos adaptada al rango de autovalores de la penalizacion
+    if lambdas is None:
+        positivos = e[e > 1e-12 * e.max()]
+        lambdas = np.logspace(np.log10(1e-3 / positivos.max()), np.log10(1e3 / positivos.min()), 100)
+    lambdas = np.asarray(lambdas, dtype=float)
+    puntuaciones = puntuacion(lambdas)
+    _, grados_libertad = evaluar(lambdas)
+   
+    # refinamos el minimo de la malla entre sus dos vecinos
+    i = int(np.argmin(puntuaciones))
+    lambda_opt = lambdas[i]
+    if 0 < i < len(lambdas) - 1:
+        refinado = optimize.minimize_scalar(lambda t: puntuacion(10**t)[0], method='bounded',
+                                            bounds=(np.log10(lambdas[i - 1]), np.log10(lambdas[i + 1])))
+        if refinado.success and refinado.fun <= puntuaciones[i]:
+            lambda_opt = 10**refinado.x
+   
+    # coeficientes del spline elegido: c = L^-T U diag(f) z
+    f = 1 / (1 + lambda_opt * e)
+    coeficientes = LtU @ (f * z)
+    suma_residuos, _ = evaluar(lambda_opt)
+   
+    return {
+        'modelo': ModeloSpline((nudos, coeficientes, 3), info_deduplicacion=info),
+        'lambda': lambda_opt,
+        'criterio': criterio,
+        'lambdas': lambdas,
+        'puntuaciones': puntuaciones,
+        'grados_libertad': grados_libertad,
+        'suma_residuos': suma_residuos[0]
+    }
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+Caché de ajustes indexada por el contenido de los puntos.
+La clave de cada ajuste es un hash blake2b de los bytes del array de puntos
+(junto con su tipo y forma), del nombre de la función de ajuste y de sus
+parámetros, así que el mismo conjunto de puntos ajustado con los mismos
+parámetros no se vuelve a ajustar aunque llegue en otro array.
+La caché en memoria es LRU de tamaño configurable; opcionalmente los
+ajustes también se guardan con pickle en un directorio para reutilizarlos
+entre ejecuciones.
+"""
+
+import os
+import sys
+import pickle
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+
+# Importaciones locales
+sys.path.append(os.path.abspath('.'))
+try:
+    from src.ajuste_curva import ajuste_polinomio, ajuste_spline, ajuste_spline_automatico
+except ImportError:
+    from ajuste_curva import ajuste_polinomio, ajuste_spline, ajuste_spline_automatico
+
+# Versión de los ajustes guardados: se incrementa cuando cambian las funciones
+# de ajuste o los modelos, para no reutilizar ajustes en disco de otra versión
+VERSION_CACHE = 1
+
+# ----- Clave de la caché -----
+
+def clave_ajuste(nombre_funcion, puntos, parametros):
+    """
+    Calcula la clave de un ajuste a partir de los puntos, los parámetros y
+    la versión de la caché.
+
+    Args:
+        nombre_funcion: nombre que identifica la función de ajuste
+        puntos: array NumPy con los puntos (x, y)
+        parametros: diccionario con los parámetros del ajuste
+
+    Returns:
+        Cadena hexadecimal con el hash del ajuste
+    """
+    puntos = np.ascontiguousarray(puntos)
+    resumen = hashlib.blake2b(digest_size=16)
+    resumen.update(f"v{VERSION_CACHE}".encode())
+    resumen.update(nombre_funcion.encode())
+    resumen.update(puntos.dtype.str.encode())
+    resumen.update(repr(puntos.shape).encode())
+    resumen.update(memoryview(puntos).cast('B'))
+    resumen.update(repr(sorted(parametros.items())).encode())
+    return resumen.hexdigest()
+
+# ----- Caché LRU con nivel opcional en disco -----
+
+class CacheAjustes:
+    """
+    Caché LRU de modelos ajustados con contadores de aciertos y fallos.
+    Se puede usar desde varios hilos (la interfaz procesa en segundo plano).
+    """
+
+    def __init__(self, tamano_max=128, directorio=None):
+        """
+        Args:
+            tamano_max: número máximo de ajustes en memoria
+            directorio: directorio para guardar los ajustes en disco; None
+                        desactiva el nivel en disco
+        """
+        if tamano_max < 1:
+            raise ValueError("El tamaño de la caché debe ser al menos 1")
+
+        self.tamano_max = tamano_max
+        self.directorio = directorio
+        self._entradas = OrderedDict()
+        self._cerrojo = threading.Lock()
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+        if directorio is not None:
+            os.makedirs(directorio, exist_ok=True)
+
+    def _ruta_disco(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pkl")
+
+    def _guardar_en_memoria(self, clave, valor):
+        self._entradas[clave] = valor
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.tamano_max:
+            self._entradas.popitem(last=False)
+            self.desalojos += 1
+
+    def _leer_disco(self, clave):
+        if self.directorio is None:
+            return None
+        ruta = self._ruta_disco(clave)
+        if not os.path.exists(ruta):
+            return None
+        try:
+            with open(ruta, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Advertencia: No se pudo leer el ajuste en caché {ruta}: {e}")
+            return None
+
+    def _escribir_disco(self, clave, valor):
+        if self.directorio is None:
+            return
+        ruta = self._ruta_disco(clave)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        try:
+            # Escribir en un temporal y renombrar para no dejar archivos a medias
+            with open(temporal, 'wb') as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, ruta)
+        except Exception as e:
+            print(f"Advertencia: No se pudo guardar el ajuste en caché {ruta}: {e}")
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+    def obtener(self, funcion, puntos, **parametros):
+        """
+        Devuelve el ajuste de funcion(puntos, **parametros), calculándolo solo
+        si no está en memoria ni en disco.
+
+        Args:
+            funcion: función de ajuste (por ejemplo ajuste_polinomio)
+            puntos: array NumPy con los puntos (x, y)
+            **parametros: parámetros de la función de ajuste
+
+        Returns:
+            El resultado de la función de ajuste
+        """
+        # el nombre no depende de si el módulo se importó como src.ajuste_curva o ajuste_curva
+        modulo = funcion.__module__.rsplit('.', 1)[-1]
+        nombre = f"{modulo}.{funcion.__qualname__}"
+        clave = clave_ajuste(nombre, puntos, parametros)
+
+        with self._cerrojo:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return self._entradas[clave]
+
+        valor = self._leer_disco(clave)
+        if valor is not None:
+            with self._cerrojo:
+                self.aciertos_disco += 1
+                self._guardar_en_memoria(clave, valor)
+            return valor
+
+        # Fallo: ajustar fuera del cerrojo para no bloquear a otros hilos
+        valor = funcion(puntos, **parametros)
+        with self._cerrojo:
+            self.fallos += 1
+            self._guardar_en_memoria(clave, valor)
+        self._escribir_disco(clave, valor)
+        return valor
+
+    def estadisticas(self):
+        """
+        Returns:
+            Diccionario con aciertos (en memoria y en disco), fallos,
+            desalojos, número de entradas y tamaño máximo
+        """
+        with self._cerrojo:
+            consultas = self.aciertos + self.aciertos_disco + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'aciertos_disco': self.aciertos_disco,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'tasa_aciertos': (self.aciertos + self.aciertos_disco) / consultas if consultas else 0.0,
+                'entradas': len(self._entradas),
+                'tamano_max': self.tamano_max
+            }
+
+    def limpiar(self, disco=False):
+        """
+        Vacía la caché en memoria y reinicia los contadores.
+
+        Args:
+            disco: si es True también borra los ajustes guardados en disco
+        """
+        with self._cerrojo:
+            self._entradas.clear()
+            self.aciertos = self.aciertos_disco = self.fallos = self.desalojos = 0
+
+        if disco and self.directorio is not None:
+            for nombre in os.listdir(self.directorio):
+                if nombre.endswith('.pkl'):
+                    os.remove(os.path.join(self.directorio, nombre))
+
+# ----- Caché compartida por el proyecto -----
+
+_cache = CacheAjustes()
+
+def configurar_cache(tamano_max=128, directorio=None):
+    """
+    Sustituye la caché compartida por una nueva con otra configuración.
+
+    Args:
+        tamano_max: número máximo de ajustes en memoria
+        directorio: directorio para el nivel en disco (None lo desactiva)
+
+    Returns:
+        La nueva caché compartida
+    """
+    global _cache
+    _cache = CacheAjustes(tamano_max, directorio)
+    return _cache
+
+def obtener_cache():
+    """Devuelve la caché compartida"""
+    return _cache
+
+def ajuste_polinomio_cache(puntos, grado=3):
+    """ajuste_polinomio memorizado en la caché compartida"""
+    return _cache.obtener(ajuste_polinomio, puntos, grado=grado)
+
+def ajuste_spline_cache(puntos, s=0.1, duplicados='primero'):
+    """ajuste_spline memorizado en la caché compartida"""
+    return _cache.obtener(ajuste_spline, puntos, s=s, duplicados=duplicados)
+
+def ajuste_spline_automatico_cache(puntos, criterio='gcv'):
+    """ajuste_spline_automatico memorizado en la caché compartida"""
+    return _cache.obtener(ajuste_spline_automatico, puntos, criterio=criterio)
@@ -1,37 +1,145 @@
 import numpy as np
-from scipy import integrate
+from scipy import integrate, interpolate
 import sys
 import os
 
+# Núcleos con backend opcional de numba
+try:
+    from src.aceleracion import longitud_poligonal
+except ImportError:
+    from aceleracion import longitud_poligonal
+
 # Intentar importar los cálculos numéricos personalizados
 try:
     sys.path.append(os.path.abspath('.'))
-    from src.calculos_numericos import longitud_arco
+    try:
+        from src.calculos_numericos import (longitud_arco, nodos_gauss_legendre,
+                                            integrando_longitud, evaluar_en_nodos,
+                                            longitud_polinomio_exacta, longitud_catenaria)
+    except ImportError:
+        from calculos_numericos import (longitud_arco, nodos_gauss_legendre,
+                                        integrando_longitud, evaluar_en_nodos,
+                                        longitud_polinomio_exacta, longitud_catenaria)
     USAR_CALCULOS_NUMERICOS = True
 except ImportError:
     USAR_CALCULOS_NUMERICOS = False
     print("Nota: No se encontró el módulo de cálculos numéricos. Usando métodos alternativos.")
 
-def calcular_longitud_curva(funcion, x_min, x_max, num_puntos=100):
+def _longitud_paneles(derivada, izquierdas, anchos, paneles, nodos, pesos):
+    """Longitud de cada tramo [izquierdas[i], izquierdas[i] + anchos[i]] con paneles[i] paneles de Gauss"""
+    tramo = np.repeat(np.arange(len(anchos)), paneles)
+    posicion = np.arange(len(tramo)) - np.repeat(np.cumsum(paneles) - paneles, paneles)
+    
+    # Centro y semiancho de cada panel
+    semianchos = anchos[tramo] / (2 * paneles[tramo])
+    centros = izquierdas[tramo] + (2 * posicion + 1) * semianchos
+    
+    # Malla (paneles x nodos) y derivada exacta evaluada en bloque
+    x = centros[:, None] + semianchos[:, None] * nodos[None, :]
+    integrando = np.sqrt(1 + derivada(x.ravel()).reshape(x.shape)**2)
+    return np.bincount(tramo, weights=semianchos * (integrando @ pesos), minlength=len(anchos))
+
+def longitud_spline_por_nudos(spline, x_min, x_max, num_puntos=100, orden=5, rtol=1e-10,
+                              max_duplicaciones=10):
+    """
+    Calcula la longitud de un spline integrando cada tramo entre nudos por separado.
+    
+    Dentro de cada tramo el spline es un polinomio, así que cortar en los
+    nudos evita los quiebres de la derivada. Cada tramo empieza con paneles
+    de Gauss-Legendre en proporción a su ancho (al menos uno, unos
+    num_puntos nodos en total) y se duplican sus paneles mientras su
+    longitud cambie más de rtol: un spline de suavizado puede tener solo
+    los nudos de los extremos, y donde la pendiente es grande y cambia de
+    signo sqrt(1 + f'^2) se parece a |f'| y pocos nodos no bastan. Todos
+    los paneles de cada ronda se evalúan juntos en un solo arreglo.
+    
+    Args:
+        spline: spline con get_knots() y derivative() (como UnivariateSpline)
+        x_min: valor mínimo del intervalo
+        x_max: valor máximo del intervalo
+        num_puntos: número aproximado de nodos de Gauss de la primera ronda
+        orden: número de nodos de Gauss por panel
+        rtol: cambio relativo máximo de la longitud de un tramo al duplicar
+        max_duplicaciones: número máximo de veces que se duplican los paneles
+        
+    Returns:
+        longitud del spline en [x_min, x_max]
+    """
+    if USAR_CALCULOS_NUMERICOS:
+        nodos, pesos = nodos_gauss_legendre(orden)
+    else:
+        nodos, pesos = np.polynomial.legendre.leggauss(orden)
+    
+    # Puntos de corte: los extremos y los nudos que caen dentro del intervalo
+    nudos = np.asarray(spline.get_knots(), dtype=float)
+    nudos = nudos[(nudos > x_min) & (nudos < x_max)]
+    cortes = np.concatenate(([x_min], nudos, [x_max]))
+    izquierdas = cortes[:-1]
+    anchos = np.diff(cortes)
+    derivada = spline.derivative()
+    
+    # Paneles iniciales de cada tramo en proporción a su ancho
+    paneles = np.maximum(1, np.ceil(num_puntos / orden * anchos / (x_max - x_min))).astype(int)
+    longitudes = _longitud_paneles(derivada, izquierdas, anchos, paneles, nodos, pesos)
+    
+    # Duplicar los paneles solo de los tramos que aún cambian
+    pendientes = np.arange(len(anchos))
+    for _ in range(max_duplicaciones):
+        paneles[pendientes] *= 2
+        nuevas = _longitud_paneles(derivada, izquierdas[pendientes], anchos[pendientes],
+                                   paneles[pendientes], nodos, pesos)
+        convergidos = np.abs(nuevas - longitudes[pendientes]) <= rtol * nuevas
+        longitudes[pendientes] = nuevas
+        pendientes = pendientes[~convergidos]
+        if len(pendientes) == 0:
+            break
+    
+    return np.sum(longitudes)
+
+def calcular_longitud_curva(funcion, x_min, x_max, num_puntos=100, metodo='simpson'):
     """
     Calcula la longitud de una curva definida por una función en un intervalo dado.
     
     Si está disponible, utiliza el módulo calculos_numericos.py con Simpson.
-    Si no, utiliza un método de aproximación por segmentos.
+    Para polinomios y splines ajustados se integra con la derivada exacta
+    del modelo; los splines se integran tramo a tramo entre sus nudos.
+    Los polinomios de grado 1 y 2 y las catenarias usan la forma cerrada,
+    sin cuadratura. Si no, utiliza un método de aproximación por segmentos.
     
     Args:
         funcion: función que define la curva y = f(x)
         x_min: valor mínimo del intervalo
         x_max: valor máximo del intervalo
         num_puntos: número de puntos para la aproximación
+        metodo: regla de integración de calculos_numericos ('simpson' o 'gauss')
         
     Returns:
         longitud aproximada de la curva
     """
+    # Formas cerradas: rectas, parábolas y catenarias
+    if USAR_CALCULOS_NUMERICOS:
+        coeficientes = getattr(funcion, 'coeficientes', None)
+        if coeficientes is not None:
+            longitud = longitud_polinomio_exacta(coeficientes, x_min, x_max)
+            if longitud is not None:
+                return longitud
+        
+        parametros_catenaria = getattr(funcion, 'parametros_catenaria', None)
+        if parametros_catenaria is not None:
+            a, x0, _ = parametros_catenaria
+            return longitud_catenaria(a, x0, x_min, x_max)
+    
+    # Splines: integración exacta por tramos entre nudos
+    if hasattr(funcion, 'get_knots') and hasattr(funcion, 'derivative'):
+        try:
+            return longitud_spline_por_nudos(funcion, x_min, x_max, num_puntos)
+        except Exception as e:
+            print(f"Error al integrar el spline por nudos: {e}")
+    
     if USAR_CALCULOS_NUMERICOS:
         # Usar la implementación de Simpson si está disponible
         try:
-            return longitud_arco(funcion, x_min, x_max, n=num_puntos)
+            return longitud_arco(funcion, x_min, x_max, n=num_puntos, metodo=metodo)
         except Exception as e:
             print(f"Error al usar cálculos numéricos: {e}")
             print("Recurriendo a método alternativo...")
@@ -48,17 +156,200 @@ def calcular_longitud_curva(funcion, x_min, x_max, num_puntos=100):
         # Si falla, evaluar punto por punto (como nuestras funciones personalizadas)
         y = np.array([funcion(xi) for xi in x])
     
-    # Calcular las diferencias entre puntos consecutivos
-    dx = np.diff(x)
-    dy = np.diff(y)
+    # Sumar las longitudes de los segmentos √(dx² + dy²)
+    longitud = longitud_poligonal(x, y)
     
-    # Calcular la longitud de los segmentos: √(dx² + dy²)
-    segmentos = np.sqrt(dx**2 + dy**2)
+    return longitud
+
+class TablaLongitudArco:
+    """
+    Tabla de longitud de arco acumulada s(x) de una función en [x_min, x_max].
     
-    # Sumar todos los segmentos para obtener la longitud total
-    longitud = np.sum(segmentos)
+    Se integra una sola vez cada panel de una malla fina con Gauss-Legendre y
+    se guardan los valores acumulados junto con la derivada s'(x) = sqrt(1 + f'(x)^2).
+    Con ellos se interpolan s(x) y su inversa x(s) mediante splines cúbicos de
+    Hermite, de modo que cada consulta cuesta una búsqueda binaria.
+    """
     
-    return longitud
+    def __init__(self, funcion, x_min, x_max, num_puntos=513, orden=5):
+        """
+        Args:
+            funcion: función que define la curva y = f(x)
+            x_min: valor mínimo del intervalo
+            x_max: valor máximo del intervalo
+            num_puntos: número de puntos de la malla de la tabla
+            orden: número de nodos de Gauss por panel
+        """
+        if not USAR_CALCULOS_NUMERICOS:
+            raise ImportError("TablaLongitudArco necesita el módulo calculos_numericos")
+        
+        self.funcion = funcion
+        self.x_min = x_min
+        self.x_max = x_max
+        self.num_puntos = num_puntos
+        
+        # Malla de la tabla; en splines se añaden los nudos como cortes
+        x = np.linspace(x_min, x_max, num_puntos)
+        if hasattr(funcion, 'get_knots'):
+            nudos = np.asarray(funcion.get_knots(), dtype=float)
+            x = np.union1d(x, nudos[(nudos > x_min) & (nudos < x_max)])
+        
+        # Longitud de cada panel con Gauss-Legendre, todos en un solo arreglo
+        integrando = integrando_longitud(funcion)
+        nodos, pesos = nodos_gauss_legendre(orden)
+        centros = (x[:-1] + x[1:]) / 2
+        semianchos = (x[1:] - x[:-1]) / 2
+        valores = evaluar_en_nodos(integrando, centros[:, None] + semianchos[:, None] * nodos[None, :])
+        longitudes_paneles = semianchos * (valores @ pesos)
+        
+        # Longitud acumulada y su derivada en los puntos de la malla
+        s = np.concatenate(([0.0], np.cumsum(longitudes_paneles)))
+        pendientes = evaluar_en_nodos(integrando, x)
+        
+        self.x = x
+        self.s = s
+        self._s_de_x = interpolate.CubicHermiteSpline(x, s, pendientes)
+        self._x_de_s = interpolate.CubicHermiteSpline(s, x, 1 / pendientes)
+    
+    @property
+    def longitud_total(self):
+        """Longitud de la curva en todo el intervalo de la tabla"""
+        return self.s[-1]
+    
+    def longitud_acumulada(self, x):
+        """Longitud de arco desde x_min hasta x (acepta arreglos)"""
+        return self._s_de_x(np.clip(x, self.x_min, self.x_max))
+    
+    def longitud_entre(self, a, b):
+        """Longitud de arco entre a y b (acepta arreglos)"""
+        return self.longitud_acumulada(b) - self.longitud_acumulada(a)
+    
+    def x_en_longitud(self, longitud):
+        """Valor de x en el que la longitud acumulada alcanza el valor dado"""
+        return self._x_de_s(np.clip(longitud, 0.0, self.longitud_total))
+    
+    def puntos_equiespaciados(self, paso):
+        """
+        Coloca puntos sobre la curva separados por la misma longitud de arco.
+        
+        Args:
+            paso: distancia a lo largo de la curva entre puntos consecutivos
+            
+        Returns:
+            Array (n, 2) con los puntos (x, y)
+        """
+        x = self.x_en_longitud(np.arange(0.0, self.longitud_total, paso))
+        return np.column_stack((x, evaluar_en_nodos(self.funcion, x)))
+
+def tabla_longitud_acumulada(funcion, x_min, x_max, num_puntos=513):
+    """
+    Devuelve la tabla de longitud acumulada de un modelo ajustado.
+    
+    La tabla queda asociada al modelo (atributo tabla_longitud) y se reutiliza
+    mientras se pida el mismo intervalo.
+    
+    Args:
+        funcion: función o modelo ajustado que define la curva y = f(x)
+        x_min: valor mínimo del intervalo
+        x_max: valor máximo del intervalo
+        num_puntos: número de puntos de la malla de la tabla
+        
+    Returns:
+        TablaLongitudArco del modelo en [x_min, x_max]
+    """
+    tabla = getattr(funcion, 'tabla_longitud', None)
+    if tabla is not None and (tabla.x_min, tabla.x_max, tabla.num_puntos) == (x_min, x_max, num_puntos):
+        return tabla
+    
+    tabla = TablaLongitudArco(funcion, x_min, x_max, num_puntos)
+    try:
+        funcion.tabla_longitud = tabla
+    except AttributeError:
+        # Funciones que no admiten atributos: la tabla no se guarda
+        pass
+    
+    return tabla
+
+def longitud_parametrica(puntos, metodo='spline', cerrada=False, s=None, orden=5,
+                         correccion_subpixel=True):
+    """
+    Calcula la longitud de una curva dada como un camino ordenado de puntos,
+    sin suponer que la curva sea de la forma y = f(x).
+    
+    Sirve para curvas verticales, que se doblan sobre sí mismas o cerradas,
+    porque el parámetro es la longitud de cuerda acumulada a lo largo del
+    camino y no la coordenada x. Todo el cálculo es una sola pasada O(n).
+    
+    Args:
+        puntos: array (n, 2) con los puntos (x, y) en el orden del camino
+        metodo: 'spline' (spline paramétrico cúbico integrado entre nudos) o
+                'poligonal' (suma de segmentos)
+        cerrada: si True la curva es cerrada (spline periódico / último
+                 segmento de vuelta al primer punto)
+        s: factor de suavizado del spline; si es None se usa n / 6, el
+           ruido de cuantización de coordenadas enteras de píxel
+        orden: número de nodos de Gauss por tramo del spline
+        correccion_subpixel: en el método poligonal, si el camino es una
+            cadena de píxeles 8-conexa se usan los pesos de Kulpa
+            (0.948 por paso recto, 1.343 por paso diagonal), que corrigen
+            el sesgo de la escalera de píxeles
+        
+    Returns:
+        longitud de la curva
+    """
+    puntos = np.asarray(puntos, dtype=float)
+    
+    # Quitar puntos repetidos consecutivos (pasos de longitud cero)
+    distintos = np.concatenate(([True], np.any(np.diff(puntos, axis=0) != 0, axis=1)))
+    puntos = puntos[distintos]
+    if cerrada and len(puntos) > 1 and np.all(puntos[0] == puntos[-1]):
+        puntos = puntos[:-1]
+    
+    if metodo == 'poligonal':
+        camino = np.vstack((puntos, puntos[:1])) if cerrada else puntos
+        pasos = np.diff(camino, axis=0)
+        
+        es_cadena = np.all(np.abs(pasos) <= 1) and np.all(pasos == np.round(pasos))
+        if correccion_subpixel and es_cadena:
+            diagonales = np.count_nonzero(np.all(pasos != 0, axis=1))
+            rectos = len(pasos) - diagonales
+            return 0.948 * rectos + 1.343 * diagonales
+        
+        return longitud_poligonal(camino[:, 0], camino[:, 1])
+    
+    elif metodo != 'spline':
+        raise ValueError(f"Método no reconocido: {metodo}")
+    
+    if s is None:
+        s = len(puntos) / 6
+    
+    # Parámetro: longitud de cuerda acumulada
+    cuerdas = np.sqrt(np.sum(np.diff(puntos, axis=0)**2, axis=1))
+    if cerrada:
+        cuerdas = np.append(cuerdas, np.sqrt(np.sum((puntos[0] - puntos[-1])**2)))
+        puntos = np.vstack((puntos, puntos[:1]))
+    u = np.concatenate(([0.0], np.cumsum(cuerdas)))
+    
+    tck, _ = interpolate.splprep([puntos[:, 0], puntos[:, 1]], u=u, s=s,
+                                 per=1 if cerrada else 0, k=min(3, len(puntos) - 1))
+    
+    if USAR_CALCULOS_NUMERICOS:
+        nodos, pesos = nodos_gauss_legendre(orden)
+    else:
+        nodos, pesos = np.polynomial.legendre.leggauss(orden)
+    
+    # Tramos entre nudos del spline y malla (tramos x nodos) de Gauss
+    nudos = np.unique(tck[0])
+    cortes = nudos[(nudos >= u[0]) & (nudos <= u[-1])]
+    centros = (cortes[:-1] + cortes[1:]) / 2
+    semianchos = (cortes[1:] - cortes[:-1]) / 2
+    t = centros[:, None] + semianchos[:, None] * nodos[None, :]
+    
+    # Rapidez |r'(t)| = √(x'(t)² + y'(t)²)
+    dx, dy = interpolate.splev(t.ravel(), tck, der=1)
+    rapidez = np.sqrt(dx**2 + dy**2).reshape(t.shape)
+    
+    return np.sum(semianchos * (rapidez @ pesos))
 
 # Método alternativo para calibrar la longitud
 def calcular_longitud_con_calibracion(longitud_pixeles, factor_escala):
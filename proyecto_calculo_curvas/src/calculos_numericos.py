@@ -1,3 +1,14 @@
+import warnings
+from functools import lru_cache
+
+import numpy as np
+
+# Nucleos con backend opcional de numba
+try:
+    from src.aceleracion import pesos_simpson, suma_simpson, longitudes_polinomios
+except ImportError:
+    from aceleracion import pesos_simpson, suma_simpson, longitudes_polinomios
+
 # derivada de una funcion
 def derivada_numerica(f, x, h=0.0001):
     """
@@ -14,8 +25,62 @@ def derivada_numerica(f, x, h=0.0001):
     """
     return (f(x + h) - f(x - h)) / (2 * h)
 
+# derivada exacta de los modelos ajustados (polinomios y splines)
+def derivada_exacta(f):
+    """
+    Obtiene la derivada exacta de f cuando f es un modelo con derivada
+    conocida: un polinomio de ajuste_polinomio (atributo coeficientes)
+    o un spline de ajuste_spline (metodo derivative()).
+   
+    Args:
+        f: funcion o modelo ajustado
+       
+    Returns:
+        Funcion que evalua f' (acepta arreglos) o None si f no es un
+        modelo reconocido
+    """
+    coeficientes = getattr(f, 'coeficientes', None)
+    if coeficientes is not None:
+        coeficientes_derivada = np.polyder(np.asarray(coeficientes, dtype=float))
+        return lambda x: np.polyval(coeficientes_derivada, x)
+   
+    derivative = getattr(f, 'derivative', None)
+    if callable(derivative):
+        try:
+            return derivative()
+        except Exception:
+            return None
+   
+    return None
+
+# evaluamos una funcion sobre un arreglo de nodos
+def evaluar_en_nodos(f, x):
+    """
+    Evalua la funcion f sobre todos los nodos x en una sola llamada.
+    Si f no acepta arreglos (o no devuelve un valor por nodo) se
+    recurre a evaluar punto por punto.
+   
+    Args:
+        f: funcion a evaluar
+        x: arreglo de nodos
+       
+    Returns:
+        Arreglo de valores de f con la misma forma que x
+    """
+    x = np.asarray(x, dtype=float)
+   
+    try:
+        valores = np.asarray(f(x), dtype=float)
+        if valores.shape == x.shape:
+            return valores
+    except Exception:
+        pass
+   
+    # la funcion no es vectorizable: evaluamos nodo por nodo
+    return np.array([f(x_i) for x_i in x.ravel()], dtype=float).reshape(x.shape)
+
 # aplicamos el metodo de simpson 1/3 compuesto
-def simpson_compuesto(f, a, b, n):
+def simpson_compuesto(f, a, b, n, vectorizado=True):
     """
     Calcula la integral definida de una funcion f en el intervalo [a, b]
     usando el metodo de Simpson 1/3 compuesto.
@@ -25,6 +90,8 @@ def simpson_compuesto(f, a, b, n):
         a: limite inferior de la integral
         b: limite superior de la integral
         n: numero de subintervalos (debe ser par)
+        vectorizado: si es True se evalua f sobre toda la malla de nodos
+            en una sola llamada y se aplican los pesos con un producto punto
        
     Returns:
         Aproximacion de la integral definida de f en [a, b]
@@ -35,6 +102,12 @@ def simpson_compuesto(f, a, b, n):
     # tamaño de cada subintervalo
     h = (b - a) / n
    
+    if vectorizado:
+        # malla completa de nodos y evaluacion en bloque
+        nodos = a + h * np.arange(n + 1)
+        valores = evaluar_en_nodos(f, nodos)
+        return suma_simpson(valores, h)
+   
     # suma de los terminos
     suma = f(a) + f(b)
    
@@ -54,36 +127,571 @@ def simpson_compuesto(f, a, b, n):
     # retornamos el resultado
     return resultado
 
+# evaluacion por nodos que marca los valores no finitos
+def evaluar_con_mascara(f, x):
+    """
+    Evalua f sobre los nodos x y marca los nodos con valores no finitos.
+    Si f falla con el arreglo completo se evalua nodo por nodo y los nodos
+    que lanzan una excepcion quedan como NaN.
+   
+    Args:
+        f: funcion a evaluar
+        x: punto o arreglo de nodos
+       
+    Returns:
+        Tupla (valores, invalidos) con los valores de f y una mascara
+        booleana de los nodos no finitos, ambos con la forma de x
+    """
+    x = np.asarray(x, dtype=float)
+   
+    try:
+        with np.errstate(all='ignore'):
+            valores = np.asarray(f(x), dtype=float)
+        if valores.shape != x.shape:
+            raise ValueError("la funcion no devuelve un valor por nodo")
+    except Exception:
+        valores = np.empty(x.shape)
+        for i, x_i in np.ndenumerate(x):
+            try:
+                with np.errstate(all='ignore'):
+                    valores[i] = f(x_i)
+            except Exception:
+                valores[i] = np.nan
+   
+    return valores, ~np.isfinite(valores)
+
+# integrando de la longitud de arco
+def integrando_longitud(f, h=0.0001, usar_derivada_exacta=True, politica='uno',
+                        diagnostico=None):
+    """
+    Construye el integrando g(x) = sqrt(1 + f'(x)^2) de la longitud de arco.
+   
+    Si f es un polinomio o spline ajustado se usa su derivada exacta;
+    en otro caso se usa la derivada numerica con paso h. Los nodos donde
+    g no es finita (o f falla) se sustituyen segun la politica, sin
+    imprimir nada; si se pasa un diccionario de diagnostico, en el se
+    acumulan el numero y la posicion de esos nodos.
+   
+    Args:
+        f: funcion que define la curva y = f(x)
+        h: paso para el cálculo de la derivada numérica
+        usar_derivada_exacta: si es False siempre se usa la derivada numerica
+        politica: sustitucion de los nodos invalidos: 'uno' (valor minimo
+            posible del integrando), 'interpolar' (interpolacion lineal
+            entre los nodos validos vecinos) o 'nan' (se propaga el NaN)
+        diagnostico: diccionario opcional donde acumular los nodos invalidos
+       
+    Returns:
+        Funcion g que acepta un punto o un arreglo de nodos
+    """
+    if politica not in ('uno', 'interpolar', 'nan'):
+        raise ValueError(f"Politica de sustitucion no reconocida: {politica}")
+   
+    derivada = derivada_exacta(f) if usar_derivada_exacta else None
+   
+    if derivada is not None:
+        # integrando con la derivada exacta, evaluado como un solo arreglo
+        def integrado_base(x):
+            return np.sqrt(1 + derivada(x)**2)
+    else:
+        # definir la funcion integrando (g(x)) = sqrt(1 + (f'(x))^2)
+        def integrado_base(x):
+            derivada = derivada_numerica(f, x, h)
+            return (1 + derivada**2)**0.5
+   
+    if diagnostico is not None:
+        diagnostico.setdefault('nodos_evaluados', 0)
+        diagnostico.setdefault('nodos_invalidos', 0)
+        diagnostico.setdefault('x_invalidos', [])
+        diagnostico['politica'] = politica
+   
+    def integrado(x):
+        valores, invalidos = evaluar_con_mascara(integrado_base, x)
+       
+        if diagnostico is not None:
+            diagnostico['nodos_evaluados'] += valores.size
+       
+        if np.any(invalidos):
+            x = np.asarray(x, dtype=float)
+            if diagnostico is not None:
+                diagnostico['nodos_invalidos'] += int(np.count_nonzero(invalidos))
+                diagnostico['x_invalidos'].extend(x[invalidos].tolist())
+           
+            if politica == 'interpolar' and np.any(~invalidos):
+                # los nodos se interpolan en orden creciente de x
+                x_plano = x.ravel()
+                validos = ~invalidos.ravel()
+                orden = np.argsort(x_plano[validos])
+                valores = valores.copy()
+                valores[invalidos] = np.interp(x[invalidos], x_plano[validos][orden],
+                                               valores.ravel()[validos][orden])
+            elif politica != 'nan':
+                valores = np.where(invalidos, 1.0, valores)
+       
+        return valores if valores.ndim > 0 else float(valores)
+   
+    return integrado
+
+# nodos y pesos de Gauss-Legendre, calculados una sola vez por orden
+@lru_cache(maxsize=None)
+def nodos_gauss_legendre(orden):
+    """
+    Devuelve los nodos y pesos de Gauss-Legendre de un orden dado en [-1, 1].
+    La tabla se calcula una sola vez por orden y se reutiliza.
+   
+    Args:
+        orden: numero de nodos por panel
+       
+    Returns:
+        Tupla (nodos, pesos) de arreglos de solo lectura
+    """
+    nodos, pesos = np.polynomial.legendre.leggauss(orden)
+    nodos.setflags(write=False)
+    pesos.setflags(write=False)
+    return nodos, pesos
+
+# cuadratura de Gauss-Legendre compuesta
+def gauss_legendre_compuesto(f, a, b, n_paneles=10, orden=5):
+    """
+    Calcula la integral definida de f en [a, b] dividiendo el intervalo en
+    paneles iguales y aplicando Gauss-Legendre de un orden dado en cada uno.
+    Todos los nodos se evaluan en un solo arreglo (paneles x nodos).
+   
+    Args:
+        f: funcion a integrar
+        a: limite inferior de la integral
+        b: limite superior de la integral
+        n_paneles: numero de paneles
+        orden: numero de nodos de Gauss por panel
+       
+    Returns:
+        Aproximacion de la integral definida de f en [a, b]
+    """
+    nodos, pesos = nodos_gauss_legendre(orden)
+   
+    # centro y semiancho de cada panel
+    semiancho = (b - a) / (2 * n_paneles)
+    centros = a + semiancho * (2 * np.arange(n_paneles) + 1)
+   
+    # malla (paneles x nodos) evaluada en bloque
+    x = centros[:, None] + semiancho * nodos[None, :]
+    valores = evaluar_en_nodos(f, x)
+   
+    return semiancho * np.sum(valores @ pesos)
+
+# longitudes de muchos polinomios en una sola pasada vectorizada
+def longitudes_lote(coeficientes, limites, n_paneles=8, orden=5):
+    """
+    Calcula la longitud de arco de varios polinomios a la vez.
+   
+    Cada fila de coeficientes (orden de np.polyfit, grado mayor primero)
+    se integra en su propio intervalo. Las derivadas se evaluan con Horner
+    sobre una matriz (curvas x nodos) y se aplica Gauss-Legendre compuesto
+    con los mismos nodos relativos para todas las curvas.
+   
+    Args:
+        coeficientes: arreglo (m, grado + 1) o lista de m secuencias de
+            coeficientes (las de menor grado se completan con ceros)
+        limites: arreglo (m, 2) con los intervalos [a, b] de cada curva
+        n_paneles: numero de paneles de Gauss por intervalo
+        orden: numero de nodos de Gauss por panel
+       
+    Returns:
+        Arreglo con las m longitudes de arco
+    """
+    # alineamos los coeficientes a la derecha (termino independiente al final)
+    filas = [np.atleast_1d(np.asarray(c, dtype=float)) for c in coeficientes]
+    if len(filas) == 0:
+        return np.empty(0)
+    columnas = max(len(c) for c in filas)
+    C = np.zeros((len(filas), columnas))
+    for i, c in enumerate(filas):
+        C[i, columnas - len(c):] = c
+   
+    limites = np.asarray(limites, dtype=float).reshape(-1, 2)
+    a = limites[:, 0]
+    ancho = limites[:, 1] - limites[:, 0]
+   
+    # coeficientes de las derivadas: c_k * k
+    potencias = np.arange(columnas - 1, 0, -1)
+    D = C[:, :-1] * potencias
+   
+    # nodos y pesos de Gauss compuesto en [0, 1]
+    nodos, pesos = nodos_gauss_legendre(orden)
+    u = ((np.arange(n_paneles)[:, None] + (nodos[None, :] + 1) / 2) / n_paneles).ravel()
+    w = np.tile(pesos, n_paneles) / (2 * n_paneles)
+   
+    # Horner de la derivada en cada nodo (compilado con numba si esta disponible)
+    return longitudes_polinomios(D, a, ancho, u, w)
+
 # funcion para calcular la integral de una funcion (longitud de arco)
-def longitud_arco(f, a, b, n=100, h=0.0001):
+def longitud_arco(f, a, b, n=100, h=0.0001, usar_derivada_exacta=True,
+                  metodo='simpson', orden=5):
     """
     Calcula la longitud de arco de una funcion f en el intervalo [a, b]
-    usando el metodo de Simpson 1/3 compuesto.
+    usando el metodo de Simpson 1/3 compuesto o Gauss-Legendre compuesto.
+   
+    Si f es un polinomio o spline ajustado se integra sqrt(1 + f'(x)^2)
+    con su derivada exacta, evitando la derivada numerica. Los nodos donde
+    el integrando no es finito se sustituyen por 1 y se emite un
+    RuntimeWarning (que warnings muestra una vez y se puede filtrar); ver
+    longitud_arco_diagnostico para conocer esos nodos o propagar el NaN.
    
     Args:
         f: funcion a integrar
         a: limite inferior de la integral
         b: limite superior de la integral
-        n: numero de subintervalos (debe ser par)
+        n: numero de subintervalos (debe ser par); con metodo='gauss'
+            se usan n // orden paneles, es decir, unos n nodos
         h: paso para el cálculo de la derivada numérica
+        usar_derivada_exacta: si es False siempre se usa la derivada numerica
+        metodo: 'simpson' o 'gauss'
+        orden: nodos de Gauss por panel (solo con metodo='gauss')
        
     Returns:
         Aproximacion de la longitud de arco de f en [a, b]
     """
-    # definir la funcion integrando (g(x)) = sqrt(1 + (f'(x))^2)
-    def integrado(x):
-        try:
-            derivada = derivada_numerica(f, x, h)
-            return (1 + derivada**2)**0.5
-        except Exception as e:
-            # En caso de error en el cálculo, devolver 1 (mínimo posible)
-            print(f"Advertencia en punto x={x}: {e}")
-            return 1.0
+    longitud, diagnostico = longitud_arco_diagnostico(f, a, b, n, h, usar_derivada_exacta,
+                                                      metodo, orden)
    
-    # calcular la integral usando simson 1/3 compuesto
-    longitud_arco = simpson_compuesto(integrado, a, b, n)
+    if diagnostico['nodos_invalidos'] > 0:
+        # mensaje fijo para que warnings lo muestre una sola vez por lugar de llamada
+        warnings.warn("El integrando de la longitud de arco no es finito en algunos nodos; se "
+                      "sustituyeron por 1 y la longitud puede no ser fiable (ver "
+                      "longitud_arco_diagnostico)", RuntimeWarning, stacklevel=2)
+    return longitud
+
+# longitud de arco con diagnostico de los nodos invalidos
+def longitud_arco_diagnostico(f, a, b, n=100, h=0.0001, usar_derivada_exacta=True,
+                              metodo='simpson', orden=5, politica='uno'):
+    """
+    Calcula la longitud de arco como longitud_arco y ademas informa de los
+    nodos donde el integrando no fue finito (por ejemplo splines
+    extrapolados) y de como se sustituyeron.
+   
+    Args:
+        f: funcion a integrar
+        a: limite inferior de la integral
+        b: limite superior de la integral
+        n: numero de subintervalos (ver longitud_arco)
+        h: paso para el cálculo de la derivada numérica
+        usar_derivada_exacta: si es False siempre se usa la derivada numerica
+        metodo: 'simpson' o 'gauss'
+        orden: nodos de Gauss por panel (solo con metodo='gauss')
+        politica: 'uno', 'interpolar' o 'nan' (ver integrando_longitud)
+       
+    Returns:
+        Tupla (longitud, diagnostico) donde diagnostico es un diccionario con
+        nodos_evaluados, nodos_invalidos, x_invalidos (arreglo) y politica
+    """
+    diagnostico = {}
+    integrado = integrando_longitud(f, h, usar_derivada_exacta, politica, diagnostico)
+   
+    if metodo == 'gauss':
+        longitud = gauss_legendre_compuesto(integrado, a, b, max(1, n // orden), orden)
+    elif metodo == 'simpson':
+        # calcular la integral usando simson 1/3 compuesto
+        longitud = simpson_compuesto(integrado, a, b, n)
+    else:
+        raise ValueError(f"Método de integración no reconocido: {metodo}")
+   
+    diagnostico['x_invalidos'] = np.array(diagnostico['x_invalidos'])
+    return longitud, diagnostico
+
+# simpson adaptativo: subdivide solo donde el error local es grande
+def simpson_adaptativo(f, a, b, rtol=1e-8, atol=1e-10, n_inicial=8, max_niveles=30,
+                       max_evaluaciones=200000):
+    """
+    Calcula la integral de f en [a, b] con Simpson adaptativo.
+   
+    Cada subintervalo se divide en dos mientras la diferencia entre la
+    regla de Simpson simple y la compuesta de dos mitades supere su parte
+    de la tolerancia. Todos los subintervalos pendientes de un mismo nivel
+    se evaluan juntos en un solo arreglo y se reutilizan los valores ya
+    calculados en los extremos y el punto medio.
+   
+    Args:
+        f: funcion a integrar
+        a: limite inferior de la integral
+        b: limite superior de la integral
+        rtol: tolerancia relativa
+        atol: tolerancia absoluta
+        n_inicial: numero de subintervalos de la particion inicial
+        max_niveles: numero maximo de subdivisiones sucesivas
+        max_evaluaciones: numero maximo de evaluaciones de f; al alcanzarlo se
+            aceptan los subintervalos pendientes y convergio es False
+       
+    Returns:
+        Diccionario con el valor de la integral, la estimacion del error,
+        el numero de evaluaciones de f y si se alcanzo la tolerancia
+    """
+    if a == b:
+        return {'valor': 0.0, 'error': 0.0, 'evaluaciones': 0, 'convergio': True}
+   
+    # particion inicial uniforme con su punto medio
+    bordes = np.linspace(a, b, n_inicial + 1)
+    A = bordes[:-1]
+    B = bordes[1:]
+    M = (A + B) / 2
+   
+    valores = evaluar_en_nodos(f, np.concatenate((bordes, M)))
+    evaluaciones = valores.size
+    FA = valores[:n_inicial]
+    FB = valores[1:n_inicial + 1]
+    FM = valores[n_inicial + 1:]
+    S = (B - A) / 6 * (FA + 4 * FM + FB)
+   
+    # cada subintervalo recibe una parte de la tolerancia proporcional a su ancho;
+    # por debajo del redondeo (unos eps*|S|) no se puede converger
+    integral = abs(np.sum(S))
+    tolerancia = max(atol, rtol * integral, 100 * np.finfo(float).eps * integral)
+    TOL = tolerancia * (B - A) / (b - a)
+   
+    total = 0.0
+    error = 0.0
+    convergio = True
+   
+    for nivel in range(max_niveles):
+        # nuevos nodos: puntos medios de cada mitad
+        L = (A + M) / 2
+        R = (M + B) / 2
+        valores = evaluar_en_nodos(f, np.concatenate((L, R)))
+        evaluaciones += valores.size
+        FL = valores[:L.size]
+        FR = valores[L.size:]
+       
+        S_izq = (M - A) / 6 * (FA + 4 * FL + FM)
+        S_der = (B - M) / 6 * (FM + 4 * FR + FB)
+        diferencia = S_izq + S_der - S
+       
+        acepta = np.abs(diferencia) <= 15 * TOL
+       
+        # el siguiente nivel evaluaria 2 nodos en cada una de las 2 mitades
+        sin_presupuesto = evaluaciones + 4 * np.count_nonzero(~acepta) > max_evaluaciones
+        if (nivel == max_niveles - 1 or sin_presupuesto) and not np.all(acepta):
+            convergio = False
+            acepta[:] = True
+       
+        # extrapolacion de Richardson en los subintervalos aceptados
+        total += np.sum(S_izq[acepta] + S_der[acepta] + diferencia[acepta] / 15)
+        error += np.sum(np.abs(diferencia[acepta])) / 15
+       
+        pendiente = ~acepta
+        if not np.any(pendiente):
+            break
+       
+        # los pendientes se parten en dos mitades
+        A, M, B = (np.concatenate((A[pendiente], M[pendiente])),
+                   np.concatenate((L[pendiente], R[pendiente])),
+                   np.concatenate((M[pendiente], B[pendiente])))
+        FA, FM, FB = (np.concatenate((FA[pendiente], FM[pendiente])),
+                      np.concatenate((FL[pendiente], FR[pendiente])),
+                      np.concatenate((FM[pendiente], FB[pendiente])))
+        S = np.concatenate((S_izq[pendiente], S_der[pendiente]))
+        TOL = np.concatenate((TOL[pendiente], TOL[pendiente])) / 2
+   
+    return {
+        'valor': float(total),
+        'error': float(error),
+        'evaluaciones': evaluaciones,
+        'convergio': convergio
+    }
+
+# longitud de arco con tolerancia en lugar de un numero fijo de subintervalos
+def longitud_arco_adaptativa(f, a, b, rtol=1e-8, atol=1e-10, h=0.0001,
+                             usar_derivada_exacta=True, max_niveles=30, max_evaluaciones=200000):
+    """
+    Calcula la longitud de arco de f en [a, b] con Simpson adaptativo,
+    concentrando los nodos donde la curva cambia rapidamente.
+   
+    Args:
+        f: funcion que define la curva y = f(x)
+        a: limite inferior del intervalo
+        b: limite superior del intervalo
+        rtol: tolerancia relativa sobre la longitud
+        atol: tolerancia absoluta sobre la longitud
+        h: paso para el cálculo de la derivada numérica
+        usar_derivada_exacta: si es False siempre se usa la derivada numerica
+        max_niveles: numero maximo de subdivisiones sucesivas
+        max_evaluaciones: numero maximo de evaluaciones del integrando
+       
+    Returns:
+        Diccionario con la longitud, la estimacion del error, el numero de
+        evaluaciones del integrando y si se alcanzo la tolerancia
+    """
+    integrado = integrando_longitud(f, h, usar_derivada_exacta)
+    resultado = simpson_adaptativo(integrado, a, b, rtol=rtol, atol=atol,
+                                   max_niveles=max_niveles, max_evaluaciones=max_evaluaciones)
+   
+    return {
+        'longitud': resultado['valor'],
+        'error': resultado['error'],
+        'evaluaciones': resultado['evaluaciones'],
+        'convergio': resultado['convergio']
+    }
+
+# romberg: trapecios sucesivos que reutilizan los nodos anteriores
+def romberg(f, a, b, rtol=1e-8, atol=1e-10, max_niveles=20, min_niveles=3):
+    """
+    Calcula la integral de f en [a, b] con el metodo de Romberg.
+   
+    En cada nivel se duplica la malla de la regla del trapecio evaluando
+    solo los nodos nuevos (los valores anteriores quedan dentro de la suma
+    acumulada) y se aplica extrapolacion de Richardson. Se detiene cuando
+    dos estimaciones sucesivas coinciden dentro de la tolerancia.
+   
+    Args:
+        f: funcion a integrar
+        a: limite inferior de la integral
+        b: limite superior de la integral
+        rtol: tolerancia relativa
+        atol: tolerancia absoluta
+        max_niveles: numero maximo de duplicaciones de la malla
+        min_niveles: niveles minimos antes de aceptar la convergencia
+       
+    Returns:
+        Diccionario con el valor de la integral, el error estimado, el
+        numero de evaluaciones de f, si se alcanzo la tolerancia y el
+        historial de convergencia (una entrada por nivel)
+    """
+    if max_niveles < 1:
+        raise ValueError("Romberg necesita al menos un nivel (max_niveles >= 1)")
+   
+    h = b - a
+    extremos = evaluar_en_nodos(f, np.array([a, b]))
+    evaluaciones = 2
+   
+    # primera fila de la tabla de Romberg: trapecio simple
+    fila_anterior = [h / 2 * np.sum(extremos)]
+    historial = []
+    convergio = False
+   
+    for nivel in range(1, max_niveles + 1):
+        # solo se evaluan los puntos medios de la malla anterior
+        h /= 2
+        nuevos = a + h * (2 * np.arange(2**(nivel - 1)) + 1)
+        valores = evaluar_en_nodos(f, nuevos)
+        evaluaciones += valores.size
+       
+        # trapecio con la malla duplicada y extrapolacion de Richardson
+        fila = [fila_anterior[0] / 2 + h * np.sum(valores)]
+        for j in range(1, nivel + 1):
+            fila.append(fila[j - 1] + (fila[j - 1] - fila_anterior[j - 1]) / (4**j - 1))
+       
+        estimacion = fila[-1]
+        diferencia = abs(estimacion - fila_anterior[-1])
+        historial.append({
+            'nivel': nivel,
+            'nodos': 2**nivel + 1,
+            'estimacion': float(estimacion),
+            'diferencia': float(diferencia)
+        })
+        fila_anterior = fila
+       
+        if nivel >= min_niveles and diferencia <= max(atol, rtol * abs(estimacion)):
+            convergio = True
+            break
+   
+    return {
+        'valor': float(estimacion),
+        'error': float(diferencia),
+        'evaluaciones': evaluaciones,
+        'convergio': convergio,
+        'historial': historial
+    }
+
+# longitud de arco con refinamiento de Romberg
+def longitud_arco_romberg(f, a, b, rtol=1e-8, atol=1e-10, h=0.0001,
+                          usar_derivada_exacta=True, max_niveles=20):
+    """
+    Calcula la longitud de arco de f en [a, b] refinando la malla con Romberg
+    hasta que dos estimaciones sucesivas coinciden.
+   
+    Args:
+        f: funcion que define la curva y = f(x)
+        a: limite inferior del intervalo
+        b: limite superior del intervalo
+        rtol: tolerancia relativa sobre la longitud
+        atol: tolerancia absoluta sobre la longitud
+        h: paso para el cálculo de la derivada numérica
+        usar_derivada_exacta: si es False siempre se usa la derivada numerica
+        max_niveles: numero maximo de duplicaciones de la malla
+       
+    Returns:
+        Diccionario con la longitud, el error estimado, el numero de
+        evaluaciones del integrando, si se alcanzo la tolerancia y el
+        historial de convergencia
+    """
+    integrado = integrando_longitud(f, h, usar_derivada_exacta)
+    resultado = romberg(integrado, a, b, rtol=rtol, atol=atol, max_niveles=max_niveles)
+   
+    return {
+        'longitud': resultado['valor'],
+        'error': resultado['error'],
+        'evaluaciones': resultado['evaluaciones'],
+        'convergio': resultado['convergio'],
+        'historial': resultado['historial']
+    }
+
+# longitud exacta de polinomios de grado 0, 1 y 2
+def longitud_polinomio_exacta(coeficientes, a, b):
+    """
+    Calcula en forma cerrada la longitud de arco de un polinomio de grado
+    a lo sumo 2 en [a, b]. Para la parabola y = A x^2 + B x + C, con
+    u = f'(x) = 2 A x + B:
+        L = [u sqrt(1 + u^2) + asinh(u)] / (4 A)  evaluado entre a y b
+   
+    Args:
+        coeficientes: coeficientes del polinomio (orden de np.polyfit)
+        a: limite inferior del intervalo
+        b: limite superior del intervalo
+       
+    Returns:
+        Longitud de arco, o None si el grado es mayor que 2 o la parabola es
+        tan plana que la forma cerrada perderia precision por cancelacion
+    """
+    coeficientes = np.trim_zeros(np.atleast_1d(np.asarray(coeficientes, dtype=float)), 'f')
+    grado = len(coeficientes) - 1
+   
+    if grado <= 0:
+        return b - a
+   
+    if grado == 1:
+        return np.sqrt(1 + coeficientes[0]**2) * (b - a)
    
-    return longitud_arco
+    if grado == 2:
+        A, B = coeficientes[0], coeficientes[1]
+        u_a = 2 * A * a + B
+        u_b = 2 * A * b + B
+       
+        # con A casi nulo los dos terminos casi se cancelan
+        if max(abs(u_a), abs(u_b), 1.0) > 1e8 * abs(A) * abs(b - a):
+            return None
+       
+        def primitiva(u):
+            return (u * np.sqrt(1 + u**2) + np.arcsinh(u)) / (4 * A)
+       
+        return primitiva(u_b) - primitiva(u_a)
+   
+    return None
+
+# longitud exacta de una catenaria
+def longitud_catenaria(a_param, x0, x_min, x_max):
+    """
+    Calcula en forma cerrada la longitud de la catenaria
+    y = c + a cosh((x - x0) / a) en [x_min, x_max]:
+        L = a [sinh((x_max - x0) / a) - sinh((x_min - x0) / a)]
+   
+    Args:
+        a_param: parametro a de la catenaria (negativo si esta invertida)
+        x0: abscisa del vertice
+        x_min: limite inferior del intervalo
+        x_max: limite superior del intervalo
+       
+    Returns:
+        Longitud de arco de la catenaria en [x_min, x_max]
+    """
+    return a_param * (np.sinh((x_max - x0) / a_param) - np.sinh((x_min - x0) / a_param))
 
 # calcular la longitud de la curva con calibracion
 def calcular_longitud_con_calibracion(longitud_piexels, factor_escala):
@@ -249,22 +249,19 @@ class ImagePanel(ttk.Frame):
     def _extraer_puntos_ejemplo(self, bordes):
         # Ejemplo simplificado de extracción de puntos
         # En la implementación real, esto vendría de Demo2.py
-        puntos = []
         contornos, _ = cv2.findContours(bordes, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
-        if contornos:
-            # Tomar el contorno más grande
-            contorno_principal = max(contornos, key=cv2.contourArea)
-            
-            # Simplificar contorno y extraer puntos
-            epsilon = 0.02 * cv2.arcLength(contorno_principal, True)
-            contorno_aproximado = cv2.approxPolyDP(contorno_principal, epsilon, True)
-            
-            for punto in contorno_aproximado:
-                x, y = punto[0]
-                puntos.append([float(x), float(y)])
+        if not contornos:
+            return np.array([])
+        
+        # Tomar el contorno más grande
+        contorno_principal = max(contornos, key=cv2.contourArea)
+        
+        # Simplificar contorno y extraer puntos (n, 1, 2) -> (n, 2)
+        epsilon = 0.02 * cv2.arcLength(contorno_principal, True)
+        contorno_aproximado = cv2.approxPolyDP(contorno_principal, epsilon, True)
         
-        return np.array(puntos) if puntos else np.array([])
+        return contorno_aproximado.reshape(-1, 2).astype(float)
     
     def _procesamiento_completado(self, puntos):
         self.ocultar_progreso()
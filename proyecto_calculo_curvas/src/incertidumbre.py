@@ -0,0 +1,156 @@
+"""
+Estimación de la incertidumbre de la longitud de una curva por bootstrap.
+Se remuestrean con reemplazo los residuos del ajuste original, se reajusta
+el modelo sobre los puntos remuestreados de cada réplica y se calcula su
+longitud; los percentiles de las longitudes dan el intervalo de confianza.
+Se remuestrean residuos y no pares (x, y) para que cada réplica conserve
+todas las abscisas: así el factor de suavizado s de los splines tiene el
+mismo significado en todas las réplicas.
+"""
+
+import os
+import sys
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+# Importaciones locales
+sys.path.append(os.path.abspath('.'))
+try:
+    from src.ajuste_curva import ajuste_polinomio, ajuste_spline
+    from src.calculo_longitud import calcular_longitud_curva
+    from src.calculos_numericos import longitudes_lote
+except ImportError:
+    from ajuste_curva import ajuste_polinomio, ajuste_spline
+    from calculo_longitud import calcular_longitud_curva
+    from calculos_numericos import longitudes_lote
+
+# ----- Réplicas de polinomios: un solo sistema de mínimos cuadrados por lotes -----
+
+def _longitudes_polinomio_bootstrap(x, Y, grado, x_min, x_max):
+    """
+    Reajusta el polinomio en todas las réplicas a la vez y calcula sus longitudes.
+
+    Args:
+        x: abscisas de los puntos (comunes a todas las réplicas)
+        Y: array (réplicas, n) con las ordenadas remuestreadas
+        grado: grado del polinomio
+        x_min, x_max: intervalo en el que se mide la longitud
+
+    Returns:
+        Array con la longitud de cada réplica
+    """
+    # Escalar x a [-1, 1] para que la matriz de Vandermonde esté bien condicionada
+    centro = (x_min + x_max) / 2
+    escala = (x_max - x_min) / 2 if x_max > x_min else 1.0
+    t = (x - centro) / escala
+
+    # Una sola factorización QR y todas las réplicas como columnas del lado derecho
+    Q, R = np.linalg.qr(np.vander(t, grado + 1))
+    coeficientes_t = np.linalg.solve(R, Q.T @ Y.T).T
+
+    # Volver a coeficientes en x: p(t) con t = (x - centro) / escala
+    base_x = np.poly1d([1 / escala, -centro / escala])
+    cambio_base = np.zeros((grado + 1, grado + 1))
+    for k in range(grado + 1):
+        potencia = (base_x**(grado - k)).coeffs
+        cambio_base[k, grado + 1 - len(potencia):] = potencia
+    coeficientes_x = coeficientes_t @ cambio_base
+
+    limites = np.tile([x_min, x_max], (len(Y), 1))
+    return longitudes_lote(coeficientes_x, limites)
+
+# ----- Réplicas de splines: repartidas entre procesos -----
+
+def _longitudes_spline_bootstrap(x, Y, s, x_min, x_max):
+    """
+    Reajusta un spline por réplica y calcula su longitud.
+    Debe ser una función de módulo para poder enviarse a otros procesos.
+
+    Args:
+        x: abscisas de los puntos (comunes a todas las réplicas)
+        Y: array (réplicas, n) con las ordenadas remuestreadas
+        s: factor de suavizado del spline
+        x_min, x_max: intervalo en el que se mide la longitud
+
+    Returns:
+        Array con la longitud de cada réplica
+    """
+    longitudes = np.empty(len(Y))
+    for r, y_replica in enumerate(Y):
+        spline = ajuste_spline(np.column_stack((x, y_replica)), s=s)
+        longitudes[r] = calcular_longitud_curva(spline, x_min, x_max)
+    return longitudes
+
+# ----- Función principal -----
+
+def bootstrap_longitud(puntos, tipo='polinomio', grado=3, s=0.1, n_replicas=200,
+                       nivel_confianza=0.95, n_procesos=None, semilla=None):
+    """
+    Calcula la longitud de la curva con un intervalo de confianza por bootstrap.
+
+    Args:
+        puntos: array NumPy con los puntos (x, y) del contorno
+        tipo: 'polinomio' o 'spline'
+        grado: grado del polinomio (solo con tipo='polinomio')
+        s: factor de suavizado (solo con tipo='spline')
+        n_replicas: número de réplicas bootstrap
+        nivel_confianza: nivel del intervalo de confianza (0-1)
+        n_procesos: procesos para las réplicas de splines; None usa todos
+                    los núcleos y 1 las ejecuta en el proceso actual
+        semilla: semilla del generador aleatorio para resultados reproducibles
+
+    Returns:
+        Diccionario con la longitud del ajuste original, el intervalo de
+        confianza, el error estándar y las longitudes de todas las réplicas
+    """
+    puntos = np.asarray(puntos, dtype=float)
+    x = puntos[:, 0]
+    y = puntos[:, 1]
+    x_min = x.min()
+    x_max = x.max()
+
+    # Ajuste original
+    if tipo == 'polinomio':
+        modelo = ajuste_polinomio(puntos, grado)
+    elif tipo == 'spline':
+        modelo = ajuste_spline(puntos, s=s)
+    else:
+        raise ValueError(f"Tipo de ajuste no reconocido: {tipo}")
+
+    longitud = calcular_longitud_curva(modelo, x_min, x_max)
+
+    # Ordenadas de todas las réplicas: ajuste + residuos remuestreados
+    ajustados = modelo(x)
+    residuos = y - ajustados
+    generador = np.random.default_rng(semilla)
+    indices = generador.integers(0, len(puntos), size=(n_replicas, len(puntos)))
+    Y = ajustados[None, :] + residuos[indices]
+
+    if tipo == 'polinomio':
+        replicas = _longitudes_polinomio_bootstrap(x, Y, grado, x_min, x_max)
+
+    elif n_procesos == 1:
+        replicas = _longitudes_spline_bootstrap(x, Y, s, x_min, x_max)
+
+    else:
+        # Un bloque de réplicas por proceso para amortizar el envío de los puntos
+        n_procesos = n_procesos or os.cpu_count() or 1
+        bloques = np.array_split(Y, n_procesos)
+        with ProcessPoolExecutor(max_workers=n_procesos) as ejecutor:
+            resultados = ejecutor.map(_longitudes_spline_bootstrap,
+                                      [x] * len(bloques), bloques,
+                                      [s] * len(bloques), [x_min] * len(bloques),
+                                      [x_max] * len(bloques))
+            replicas = np.concatenate(list(resultados))
+
+    # Intervalo de percentiles
+    alfa = (1 - nivel_confianza) / 2
+    inferior, superior = np.quantile(replicas, [alfa, 1 - alfa])
+
+    return {
+        'longitud': longitud,
+        'intervalo': (inferior, superior),
+        'nivel_confianza': nivel_confianza,
+        'error_estandar': np.std(replicas, ddof=1),
+        'replicas': replicas
+    }
@@ -0,0 +1,274 @@
+"""
+Modelos ajustados como objetos compactos en lugar de funciones anidadas.
+Cada modelo guarda solo sus parámetros (en __slots__), se evalúa sobre
+arreglos completos, se puede serializar con pickle (y por tanto enviar a
+otros procesos o guardar en disco) y expone derivative(), domain y nbytes.
+Mantienen los atributos que ya usa el resto del proyecto: coeficientes
+en polinomios, get_knots() en splines y parametros_catenaria en catenarias.
+"""
+
+import numpy as np
+from scipy import interpolate
+
+# ----- Clase base -----
+
+class ModeloAjustado:
+    """
+    Base de los modelos ajustados: dominio del ajuste y serialización.
+
+    El atributo tabla_longitud lo usa calculo_longitud para guardar la tabla
+    de longitud acumulada del modelo; no se serializa porque se puede
+    reconstruir y ocupa mucho más que el propio modelo.
+    """
+
+    __slots__ = ('x_min', 'x_max', 'tabla_longitud')
+
+    def __init__(self, x_min=-np.inf, x_max=np.inf):
+        """
+        Args:
+            x_min: valor mínimo del intervalo en el que se ajustó el modelo
+            x_max: valor máximo del intervalo en el que se ajustó el modelo
+        """
+        self.x_min = float(x_min)
+        self.x_max = float(x_max)
+        self.tabla_longitud = None
+
+    @property
+    def domain(self):
+        """Intervalo (x_min, x_max) en el que se ajustó el modelo"""
+        return (self.x_min, self.x_max)
+
+    @property
+    def nbytes(self):
+        """Memoria ocupada por los arreglos de parámetros del modelo"""
+        return sum(valor.nbytes for valor in self._parametros() if isinstance(valor, np.ndarray))
+
+    def _parametros(self):
+        return ()
+
+    def __getstate__(self):
+        estado = {}
+        for clase in type(self).__mro__:
+            for nombre in getattr(clase, '__slots__', ()):
+                if nombre != 'tabla_longitud' and hasattr(self, nombre):
+                    estado[nombre] = getattr(self, nombre)
+        return estado
+
+    def __setstate__(self, estado):
+        for nombre, valor in estado.items():
+            setattr(self, nombre, valor)
+        self.tabla_longitud = None
+
+# ----- Polinomios -----
+
+class ModeloPolinomio(ModeloAjustado):
+    """Polinomio y = p(x) con coeficientes en el orden de np.polyfit"""
+
+    __slots__ = ('coeficientes',)
+
+    def __init__(self, coeficientes, x_min=-np.inf, x_max=np.inf):
+        """
+        Args:
+            coeficientes: coeficientes del polinomio, grado mayor primero
+            x_min, x_max: intervalo en el que se ajustó el polinomio
+        """
+        super().__init__(x_min, x_max)
+        self.coeficientes = np.atleast_1d(np.asarray(coeficientes, dtype=float))
+
+    def __call__(self, x):
+        return np.polyval(self.coeficientes, x)
+
+    @property
+    def grado(self):
+        """Grado del polinomio"""
+        return len(self.coeficientes) - 1
+
+    def derivative(self, n=1):
+        """Devuelve la derivada n-ésima como otro ModeloPolinomio"""
+        return ModeloPolinomio(np.polyder(self.coeficientes, n), self.x_min, self.x_max)
+
+    def _parametros(self):
+        return (self.coeficientes,)
+
+    def __repr__(self):
+        return f"ModeloPolinomio(grado={self.grado}, domain={self.domain})"
+
+# ----- Splines -----
+
+class ModeloSpline(ModeloAjustado):
+    """
+    Spline definido por su representación B-spline tck = (nudos, coeficientes, k),
+    la misma que usan splrep/splev y UnivariateSpline.
+    Fuera del dominio se extrapola con el primer o último tramo.
+    """
+
+    __slots__ = ('nudos', 'coeficientes_spline', 'k', 'info_deduplicacion')
+
+    def __init__(self, tck, x_min=None, x_max=None, info_deduplicacion=None):
+        """
+        Args:
+            tck: tupla (nudos, coeficientes, grado) del B-spline
+            x_min, x_max: intervalo del ajuste; por defecto el de los nudos
+            info_deduplicacion: información de eliminar_duplicados_x
+        """
+        nudos, coeficientes, k = tck
+        nudos = np.asarray(nudos, dtype=float)
+        super().__init__(nudos[k] if x_min is None else x_min,
+                         nudos[-k - 1] if x_max is None else x_max)
+        # splev/splder esperan tantos coeficientes como nudos (relleno con ceros)
+        coeficientes = np.asarray(coeficientes, dtype=float)
+        if len(coeficientes) < len(nudos):
+            coeficientes = np.concatenate((coeficientes, np.zeros(len(nudos) - len(coeficientes))))
+        self.nudos = nudos
+        self.coeficientes_spline = coeficientes
+        self.k = int(k)
+        self.info_deduplicacion = info_deduplicacion
+
+    @classmethod
+    def desde_univariate(cls, spline, k=3, info_deduplicacion=None):
+        """Crea el modelo a partir de un UnivariateSpline de grado k ya ajustado"""
+        nudos_internos = np.asarray(spline.get_knots(), dtype=float)
+        nudos = np.concatenate(([nudos_internos[0]] * k, nudos_internos, [nudos_internos[-1]] * k))
+        return cls((nudos, spline.get_coeffs(), k), info_deduplicacion=info_deduplicacion)
+
+    @property
+    def tck(self):
+        """Representación (nudos, coeficientes, grado) para splev"""
+        return (self.nudos, self.coeficientes_spline, self.k)
+
+    def __call__(self, x):
+        y = interpolate.splev(x, self.tck, ext=0)
+        return y if np.ndim(y) else y[()]
+
+    def get_knots(self):
+        """Nudos distintos del spline, como UnivariateSpline.get_knots()"""
+        return self.nudos[self.k:len(self.nudos) - self.k]
+
+    def get_coeffs(self):
+        """Coeficientes B-spline, como UnivariateSpline.get_coeffs()"""
+        return self.coeficientes_spline[:len(self.nudos) - self.k - 1]
+
+    def derivative(self, n=1):
+        """Devuelve la derivada n-ésima como otro ModeloSpline"""
+        return ModeloSpline(interpolate.splder(self.tck, n), self.x_min, self.x_max)
+
+    def _parametros(self):
+        return (self.nudos, self.coeficientes_spline)
+
+    def __repr__(self):
+        return f"ModeloSpline(k={self.k}, nudos={len(self.get_knots())}, domain={self.domain})"
+
+# ----- Polinomios por tramos -----
+
+class ModeloPorTramos(ModeloAjustado):
+    """
+    Un polinomio distinto en cada intervalo [limites[i], limites[i + 1]].
+    Fuera del dominio se usan el primer y el último polinomio.
+    """
+
+    __slots__ = ('limites', 'coeficientes_tramos')
+
+    def __init__(self, limites, coeficientes_tramos):
+        """
+        Args:
+            limites: extremos de los tramos en orden creciente (m + 1 valores)
+            coeficientes_tramos: m secuencias de coeficientes (orden de
+                np.polyfit); las de menor grado se completan con ceros
+        """
+        limites = np.asarray(limites, dtype=float)
+        super().__init__(limites[0], limites[-1])
+
+        filas = [np.atleast_1d(np.asarray(c, dtype=float)) for c in coeficientes_tramos]
+        if len(filas) != len(limites) - 1:
+            raise ValueError("Debe haber un polinomio por cada tramo")
+
+        # alineamos a la derecha para que el término independiente quede al final
+        num_coeficientes = max(len(fila) for fila in filas)
+        matriz = np.zeros((len(filas), num_coeficientes))
+        for i, fila in enumerate(filas):
+            matriz[i, num_coeficientes - len(fila):] = fila
+
+        self.limites = limites
+        self.coeficientes_tramos = matriz
+
+    @property
+    def num_tramos(self):
+        """Número de tramos del modelo"""
+        return len(self.coeficientes_tramos)
+
+    def tramo(self, x):
+        """Índice del tramo al que pertenece cada x"""
+        indices = np.searchsorted(self.limites, x, side='right') - 1
+        return np.clip(indices, 0, self.num_tramos - 1)
+
+    def __call__(self, x):
+        x_arr = np.asarray(x, dtype=float)
+        coeficientes = self.coeficientes_tramos[self.tramo(x_arr)]
+
+        # Horner con los coeficientes del tramo de cada punto
+        y = np.zeros(x_arr.shape)
+        for j in range(self.coeficientes_tramos.shape[1]):
+            y = y * x_arr + coeficientes[..., j]
+        return y if y.ndim else y[()]
+
+    def get_knots(self):
+        """Extremos de los tramos, para integrar cada tramo por separado"""
+        return self.limites
+
+    def derivative(self, n=1):
+        """Devuelve la derivada n-ésima como otro ModeloPorTramos"""
+        return ModeloPorTramos(self.limites, [np.polyder(fila, n) for fila in self.coeficientes_tramos])
+
+    def _parametros(self):
+        return (self.limites, self.coeficientes_tramos)
+
+    def __repr__(self):
+        return f"ModeloPorTramos(tramos={self.num_tramos}, domain={self.domain})"
+
+# ----- Catenarias -----
+
+class ModeloCatenaria(ModeloAjustado):
+    """
+    Catenaria y = c + a*cosh((x - x0)/a), o su derivada n-ésima si orden > 0.
+    """
+
+    __slots__ = ('a', 'x0', 'c', 'orden')
+
+    def __init__(self, a, x0, c, x_min=-np.inf, x_max=np.inf, orden=0):
+        """
+        Args:
+            a, x0, c: parámetros de la catenaria
+            x_min, x_max: intervalo en el que se ajustó la catenaria
+            orden: orden de derivación (0 para la propia catenaria)
+        """
+        super().__init__(x_min, x_max)
+        self.a = float(a)
+        self.x0 = float(x0)
+        self.c = float(c)
+        self.orden = int(orden)
+
+    @property
+    def parametros_catenaria(self):
+        """Parámetros (a, x0, c); None en las derivadas"""
+        return (self.a, self.x0, self.c) if self.orden == 0 else None
+
+    def __call__(self, x):
+        u = (np.asarray(x, dtype=float) - self.x0) / self.a
+        if self.orden == 0:
+            return self.c + self.a * np.cosh(u)
+
+        # d^n/dx^n [a cosh(u)] = a^(1-n) * (sinh(u) si n es impar, cosh(u) si es par)
+        hiperbolica = np.sinh(u) if self.orden % 2 == 1 else np.cosh(u)
+        return self.a ** (1 - self.orden) * hiperbolica
+
+    def derivative(self, n=1):
+        """Devuelve la derivada n-ésima como otro ModeloCatenaria"""
+        return ModeloCatenaria(self.a, self.x0, self.c, self.x_min, self.x_max, self.orden + n)
+
+    @property
+    def nbytes(self):
+        """Memoria ocupada por los parámetros del modelo"""
+        return 3 * np.dtype(float).itemsize
+
+    def __repr__(self):
+        return f"ModeloCatenaria(a={self.a:.6g}, x0={self.x0:.6g}, c={self.c:.6g}, orden={self.orden})"
@@ -27,20 +27,182 @@ def detectar_bordes(imagen):
     return bordes
 
 # extramos los puntos de la curva 
-def extraer_puntos_curva(imagen_bordes): 
-    """extrae los puntos que forman la curva desde una imagen de bordes"""
+def extraer_puntos_curva(imagen_bordes, aproximacion=cv2.CHAIN_APPROX_SIMPLE, ordenar=True): 
+    """
+    extrae los puntos que forman la curva desde una imagen de bordes
+
+    Args:
+        imagen_bordes: imagen binaria de bordes
+        aproximacion: modo de aproximacion del contorno de OpenCV;
+                      cv2.CHAIN_APPROX_NONE conserva todos los pixeles (sin
+                      sesgo en la longitud) y cv2.CHAIN_APPROX_SIMPLE solo
+                      los extremos de los tramos rectos
+        ordenar: si True los puntos se ordenan por x (orden estable)
+
+    Returns:
+        array (n, 2) de tipo int32 con los puntos (x, y)
+    """
     # encontramos los contornos de la imagen
-    contornos, _ = cv2.findContours(imagen_bordes, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contornos, _ = cv2.findContours(imagen_bordes, cv2.RETR_EXTERNAL, aproximacion)
     
     # seleccionar el contorno mas largo (asumiendo que nuestra curva)
     contorno_curva = max(contornos, key=cv2.contourArea)
     
-    # extrae los puntos (x,y) del contorno 
-    puntos = []
-    for punto in contorno_curva:
-        x, y = punto[0]
-        puntos.append((x, y))
+    # el contorno (n, 1, 2) se ve como (n, 2) sin copiar
+    puntos = contorno_curva.reshape(-1, 2)
         
     # ordenamos los puntos por coordenada x 
-    puntos.sort(key=lambda p: p[0])
-    return np.array(puntos)
\ No newline at end of file
+    if ordenar:
+        puntos = puntos[np.argsort(puntos[:, 0], kind='stable')]
+    return np.ascontiguousarray(puntos, dtype=np.int32)
+
+# extraemos el contorno de la curva en el orden en que se recorre
+def extraer_contorno_ordenado(imagen_bordes, abierto=True):
+    """
+    extrae los puntos de la curva en el orden del contorno, sin ordenarlos por x,
+    para usarlos con longitud_parametrica (curvas verticales o que se doblan)
+
+    Args:
+        imagen_bordes: imagen binaria de bordes
+        abierto: si True y el borde es una linea de un pixel de ancho, el
+                 contorno (que la recorre de ida y de vuelta) se corta entre
+                 sus dos extremos y se devuelve solo el camino de ida
+
+    Returns:
+        array (n, 2) de puntos (x, y) en orden de recorrido
+    """
+    contornos, _ = cv2.findContours(imagen_bordes, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+    contorno_curva = max(contornos, key=len)
+    puntos = contorno_curva.reshape(-1, 2)
+
+    if abierto and len(puntos) > 3:
+        # los extremos de la linea son los puntos donde el recorrido da la vuelta
+        # (vuelve al pixel anterior en uno o dos pasos)
+        anterior = np.roll(puntos, 1, axis=0)
+        vuelta = (np.all(anterior == np.roll(puntos, -1, axis=0), axis=1) |
+                  np.all(anterior == np.roll(puntos, -2, axis=0), axis=1))
+        extremos = np.flatnonzero(vuelta)
+
+        if len(extremos) >= 2:
+            # con ramas sueltas hay mas vueltas: se toman los dos extremos que
+            # parten el contorno mas cerca de la mitad (ida y vuelta)
+            i, j = np.triu_indices(len(extremos), k=1)
+            mejor = np.argmin(np.abs(extremos[j] - extremos[i] - len(puntos) / 2))
+            return puntos[extremos[i[mejor]]:extremos[j[mejor]] + 1]
+
+    return puntos
+
+# distancia de cada punto al segmento a-b (vectorizado)
+def _distancia_a_segmentos(p, a, b):
+    """distancia de los puntos p a los segmentos a-b (arrays (n, 2))"""
+    ab = b - a
+    longitud2 = np.sum(ab * ab, axis=1)
+    t = np.sum((p - a) * ab, axis=1) / np.where(longitud2 > 0, longitud2, 1.0)
+    proyeccion = a + np.clip(t, 0.0, 1.0)[:, None] * ab
+    return np.hypot(*(p - proyeccion).T)
+
+# desviacion de la poligonal decimada respecto a la original
+def _desviacion_maxima(puntos, indices):
+    """distancia maxima de los puntos originales a la poligonal que une puntos[indices]"""
+    if len(indices) < 2:
+        return 0.0
+    tramo = np.clip(np.searchsorted(indices, np.arange(len(puntos)), side='right') - 1, 0, len(indices) - 2)
+    distancias = _distancia_a_segmentos(puntos, puntos[indices[tramo]], puntos[indices[tramo + 1]])
+    return float(distancias.max())
+
+# Douglas-Peucker procesando todos los tramos de un nivel a la vez
+def _douglas_peucker(puntos, tolerancia, max_puntos):
+    """indices de los puntos que conserva Douglas-Peucker (con presupuesto opcional)"""
+    n = len(puntos)
+    conservar = np.zeros(n, dtype=bool)
+    conservar[[0, n - 1]] = True
+    total = 2
+    inicios = np.array([0])
+    finales = np.array([n - 1])
+
+    while len(inicios) and (max_puntos is None or total < max_puntos):
+        # puntos interiores de todos los tramos activos, tramo a tramo
+        interiores = finales - inicios - 1
+        activos = interiores > 0
+        inicios, finales, interiores = inicios[activos], finales[activos], interiores[activos]
+        if len(inicios) == 0:
+            break
+        tramo = np.repeat(np.arange(len(inicios)), interiores)
+        desplazamientos = np.concatenate(([0], np.cumsum(interiores)[:-1]))
+        indices = inicios[tramo] + 1 + np.arange(len(tramo)) - desplazamientos[tramo]
+
+        # punto mas alejado de la cuerda en cada tramo
+        distancias = _distancia_a_segmentos(puntos[indices], puntos[inicios[tramo]], puntos[finales[tramo]])
+        maximos = np.maximum.reduceat(distancias, desplazamientos)
+        primeros = np.flatnonzero(distancias == maximos[tramo])
+        _, posiciones = np.unique(tramo[primeros], return_index=True)
+        mas_alejados = indices[primeros[posiciones]]
+
+        # partir los tramos que superan la tolerancia (los peores primero si hay presupuesto)
+        dividir = np.flatnonzero(maximos > tolerancia)
+        if max_puntos is not None and len(dividir) > max_puntos - total:
+            dividir = dividir[np.argsort(-maximos[dividir], kind='stable')[:max_puntos - total]]
+        if len(dividir) == 0:
+            break
+        conservar[mas_alejados[dividir]] = True
+        total += len(dividir)
+
+        inicios, finales = (np.concatenate((inicios[dividir], mas_alejados[dividir])),
+                            np.concatenate((mas_alejados[dividir], finales[dividir])))
+
+    return np.flatnonzero(conservar)
+
+# reducimos los puntos del contorno antes de ajustar
+def decimar_contorno(puntos, tolerancia=None, max_puntos=None, metodo='douglas_peucker'):
+    """
+    reduce los puntos de la curva (en el orden en que se dan) para que el
+    coste de los ajustes no crezca con la resolucion de la imagen
+
+    Los puntos deben estar en el orden en que se recorre la curva (por ejemplo
+    extraer_puntos_curva(..., ordenar=False) o extraer_contorno_ordenado): si
+    se ordenan antes por x, los dos lados del borde se intercalan, la
+    poligonal zigzaguea y apenas se eliminan puntos. Para ajustar, se
+    ordenan por x despues de decimar.
+
+    Args:
+        puntos: array (n, 2) de puntos (x, y) en orden de recorrido
+        tolerancia: distancia maxima en pixeles de los puntos eliminados a la
+                    poligonal resultante (solo 'douglas_peucker')
+        max_puntos: numero maximo de puntos a conservar
+        metodo: 'douglas_peucker' (conserva los puntos donde la curva se dobla)
+                o 'arco' (max_puntos puntos equiespaciados en longitud de arco)
+
+    Returns:
+        tupla (puntos_decimados, info); info contiene los indices conservados,
+        el numero de puntos antes y despues y la desviacion maxima introducida
+    """
+    puntos = np.asarray(puntos)
+    n = len(puntos)
+    coordenadas = puntos.astype(float)
+
+    if metodo not in ('douglas_peucker', 'arco'):
+        raise ValueError(f"Metodo de decimado no reconocido: {metodo}")
+    if metodo == 'arco' and max_puntos is None:
+        raise ValueError("El metodo 'arco' necesita max_puntos")
+
+    if n <= 2 or (tolerancia is None and (max_puntos is None or n <= max_puntos)):
+        # nada que decimar
+        indices = np.arange(n)
+    elif metodo == 'douglas_peucker':
+        indices = _douglas_peucker(coordenadas, 0.0 if tolerancia is None else tolerancia,
+                                   None if max_puntos is None else max(max_puntos, 2))
+    else:
+        # puntos originales mas cercanos a posiciones equiespaciadas en longitud de arco
+        arco = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(coordenadas, axis=0).T))))
+        objetivos = np.linspace(0.0, arco[-1], max(max_puntos, 2))
+        indices = np.unique(np.clip(np.searchsorted(arco, objetivos), 0, n - 1))
+        indices = np.union1d(indices, [0, n - 1])
+
+    info = {
+        'metodo': metodo,
+        'indices': indices,
+        'puntos_originales': n,
+        'puntos_finales': len(indices),
+        'desviacion_maxima': _desviacion_maxima(coordenadas, indices)
+    }
+    return puntos[indices], info
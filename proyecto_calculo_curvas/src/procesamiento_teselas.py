@@ -0,0 +1,312 @@
+"""
+Procesamiento por teselas de imágenes muy grandes (panorámicas de dron,
+escaneos de gigapíxeles) sin cargarlas enteras en memoria.
+La imagen se abre mapeada en memoria (.npy, raw o TIFF sin comprimir) y se
+recorre tesela a tesela: cada tesela se lee con un margen (halo) alrededor,
+se pasa a grises, se suaviza y se detectan sus bordes igual que en
+procesamiento.py, y se conserva solo su parte central. Los fragmentos de
+borde de teselas vecinas que se tocan se unen con una estructura
+union-find, de modo que la memoria máxima depende del tamaño de la tesela
+y no del de la imagen.
+"""
+
+import os
+import cv2
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+# Intentar importar tifffile (dependencia opcional para TIFF)
+try:
+    import tifffile
+    TIFFFILE_DISPONIBLE = True
+except ImportError:
+    TIFFFILE_DISPONIBLE = False
+
+# ----- Lectura de la imagen mapeada en memoria -----
+
+def abrir_imagen_mapeada(ruta, forma=None, dtype=np.uint8):
+    """
+    Abre una imagen sin leerla: devuelve un array mapeado en memoria del que
+    solo se leen del disco las regiones que se recortan.
+
+    Args:
+        ruta: archivo .npy, .tif/.tiff sin comprimir (requiere tifffile) o
+              raw (.raw, .bin) con los píxeles seguidos por filas
+        forma: (alto, ancho) o (alto, ancho, canales); obligatoria en raw
+        dtype: tipo de los píxeles en raw
+
+    Returns:
+        Array de solo lectura (alto, ancho) o (alto, ancho, canales)
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+
+    if extension == '.npy':
+        return np.load(ruta, mmap_mode='r')
+
+    if extension in ('.tif', '.tiff'):
+        if not TIFFFILE_DISPONIBLE:
+            raise ImportError("tifffile no está instalado; necesario para leer TIFF por teselas")
+        try:
+            return tifffile.memmap(ruta, mode='r')
+        except ValueError as e:
+            raise ValueError(f"El TIFF no se puede mapear en memoria (¿está comprimido?): {e}. "
+                             "Guárdelo sin compresión o como .npy") from e
+
+    if forma is None:
+        raise ValueError(f"Se necesita la forma de la imagen para leer {ruta} como raw")
+    return np.memmap(ruta, dtype=dtype, mode='r', shape=tuple(forma))
+
+# ----- Unión de fragmentos -----
+
+class UnionFind:
+    """Conjuntos disjuntos de fragmentos con compresión de caminos"""
+
+    def __init__(self):
+        self.padre = []
+
+    def agregar(self, cantidad):
+        """Añade cantidad fragmentos nuevos y devuelve el identificador del primero"""
+        inicio = len(self.padre)
+        self.padre.extend(range(inicio, inicio + cantidad))
+        return inicio
+
+    def raiz(self, i):
+        padre = self.padre
+        while padre[i] != i:
+            padre[i] = padre[padre[i]]
+            i = padre[i]
+        return i
+
+    def unir(self, a, b):
+        raiz_a, raiz_b = self.raiz(a), self.raiz(b)
+        if raiz_a != raiz_b:
+            self.padre[max(raiz_a, raiz_b)] = min(raiz_a, raiz_b)
+
+def _pares_costura(etiquetas_a, etiquetas_b):
+    """
+    Pares de fragmentos que se tocan (vecindad 8) a través de una costura.
+
+    Args:
+        etiquetas_a: identificadores globales de la última fila/columna de una tesela
+        etiquetas_b: identificadores de la primera fila/columna de la vecina
+
+    Returns:
+        Array (pares, 2) sin repetidos
+    """
+    pares = []
+    for desplazamiento in (-1, 0, 1):
+        if desplazamiento < 0:
+            a, b = etiquetas_a[-desplazamiento:], etiquetas_b[:desplazamiento]
+        elif desplazamiento > 0:
+            a, b = etiquetas_a[:-desplazamiento], etiquetas_b[desplazamiento:]
+        else:
+            a, b = etiquetas_a, etiquetas_b
+        tocan = (a >= 0) & (b >= 0)
+        pares.append(np.column_stack((a[tocan], b[tocan])))
+    pares = np.concatenate(pares)
+    return np.unique(pares, axis=0) if len(pares) else pares
+
+# ----- Bordes de una tesela -----
+
+def _bordes_tesela(imagen, y0, y1, x0, x1, halo, rgb, umbral_bajo, umbral_alto):
+    """
+    Detecta los bordes de la región [y0:y1, x0:x1] leyendo además un halo
+    alrededor, para que el suavizado y Canny vean los píxeles vecinos.
+
+    Returns:
+        Imagen binaria de bordes de la región central
+    """
+    alto, ancho = imagen.shape[:2]
+    ya, yb = max(0, y0 - halo), min(alto, y1 + halo)
+    xa, xb = max(0, x0 - halo), min(ancho, x1 + halo)
+    tesela = np.ascontiguousarray(imagen[ya:yb, xa:xb])
+
+    # Canny necesita 8 bits: escala fija (no por tesela) para que los umbrales
+    # signifiquen lo mismo en toda la imagen
+    if tesela.dtype != np.uint8:
+        maximo = np.iinfo(tesela.dtype).max if np.issubdtype(tesela.dtype, np.integer) else 1.0
+        tesela = np.clip(tesela.astype(np.float32) * (255.0 / maximo), 0, 255).astype(np.uint8)
+
+    # mismos pasos que preprocesar_imagen y detectar_bordes
+    if tesela.ndim == 3 and tesela.shape[2] == 4:
+        tesela = cv2.cvtColor(tesela, cv2.COLOR_RGBA2GRAY if rgb else cv2.COLOR_BGRA2GRAY)
+    elif tesela.ndim == 3:
+        tesela = cv2.cvtColor(tesela, cv2.COLOR_RGB2GRAY if rgb else cv2.COLOR_BGR2GRAY)
+    suavizada = cv2.GaussianBlur(tesela, (5, 5), 0)
+    bordes = cv2.Canny(suavizada, umbral_bajo, umbral_alto)
+
+    return bordes[y0 - ya:y1 - ya, x0 - xa:x1 - xa]
+
+def _recorrer_teselas(alto, ancho, tamano_tesela):
+    """Genera (fila, columna, y0, y1, x0, x1) de cada tesela en orden por filas"""
+    for fila, y0 in enumerate(range(0, alto, tamano_tesela)):
+        for columna, x0 in enumerate(range(0, ancho, tamano_tesela)):
+            yield fila, columna, y0, min(y0 + tamano_tesela, alto), x0, min(x0 + tamano_tesela, ancho)
+
+# ----- Orden de recorrido -----
+
+def _ordenar_recorrido(puntos, ancho):
+    """
+    Ordena los píxeles de una componente conexa siguiendo la curva: recorrido
+    en profundidad del grafo de vecindad 8 desde el píxel más a la izquierda.
+    En una línea es el camino de un extremo al otro; en las ramificaciones el
+    recorrido salta de vuelta al punto donde se separan.
+
+    Args:
+        puntos: array (n, 2) de puntos (x, y) ordenados por x y luego por y
+        ancho: ancho de la imagen
+
+    Returns:
+        Array (n, 2) con los mismos puntos en orden de recorrido
+    """
+    n = len(puntos)
+    claves = puntos[:, 1].astype(np.int64) * ancho + puntos[:, 0]
+    orden_claves = np.argsort(claves)
+    claves_ordenadas = claves[orden_claves]
+
+    # aristas hacia los 8 vecinos presentes en la componente
+    origenes, destinos = [], []
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if dx == 0 and dy == 0:
+                continue
+            x_vecino = puntos[:, 0] + dx
+            vecinos = claves + dy * ancho + dx
+            posiciones = np.clip(np.searchsorted(claves_ordenadas, vecinos), 0, n - 1)
+            existe = (claves_ordenadas[posiciones] == vecinos) & (x_vecino >= 0) & (x_vecino < ancho)
+            origenes.append(np.flatnonzero(existe))
+            destinos.append(orden_claves[posiciones[existe]])
+    origenes = np.concatenate(origenes)
+    destinos = np.concatenate(destinos)
+    grafo = sparse.csr_matrix((np.ones(len(origenes), dtype=np.int8), (origenes, destinos)), shape=(n, n))
+
+    orden = csgraph.depth_first_order(grafo, 0, directed=False, return_predecessors=False)
+    if len(orden) < n:
+        # puntos no conectados con el primero: se añaden al final por x
+        orden = np.concatenate((orden, np.setdiff1d(np.arange(n), orden)))
+    return puntos[orden]
+
+# ----- Función principal -----
+
+def extraer_puntos_curva_teselas(imagen, tamano_tesela=2048, halo=16, forma=None, dtype=np.uint8,
+                                 rgb=None, umbral_bajo=50, umbral_alto=150, ordenar=True):
+    """
+    Extrae los puntos de la curva de una imagen grande procesándola por teselas.
+
+    Primera pasada: se detectan los bordes de cada tesela, se etiquetan sus
+    fragmentos conexos (vecindad 8) y se unen con los de las teselas vecinas
+    que los tocan a través de la costura; solo se guardan los tamaños de los
+    fragmentos y las filas/columnas de las costuras. Segunda pasada: se
+    vuelven a procesar las teselas y se recogen los píxeles de la curva
+    más larga (la componente con más píxeles de borde).
+
+    El suavizado y el gradiente de Canny solo necesitan unos pocos píxeles
+    de halo, así que los bordes coinciden con los de la imagen completa
+    salvo cadenas de histéresis que se extiendan más allá del halo.
+
+    Los puntos no son los mismos que da extraer_puntos_curva: aquí se
+    devuelven todos los píxeles de borde de la componente conexa con más
+    píxeles, mientras que extraer_puntos_curva devuelve el contorno exterior
+    de mayor área (cv2.contourArea), recorrido de ida y vuelta y, con
+    CHAIN_APPROX_SIMPLE, solo con los extremos de los tramos rectos. Trazar
+    ese contorno exigiría tener toda la componente en memoria.
+
+    Args:
+        imagen: ruta de la imagen (ver abrir_imagen_mapeada) o array ya abierto
+        tamano_tesela: lado de las teselas en píxeles
+        halo: margen en píxeles que se lee alrededor de cada tesela
+        forma, dtype: forma y tipo de los píxeles de los archivos raw
+        rgb: True si los canales están en orden RGB (TIFF) y False si son BGR
+             (OpenCV); None lo deduce de la extensión del archivo
+        umbral_bajo, umbral_alto: umbrales de histéresis de Canny
+        ordenar: si True los puntos se ordenan por x (y luego por y); si es
+                 False se dan en orden de recorrido de la curva, que es el
+                 que necesita decimar_contorno
+
+    Returns:
+        Diccionario con 'puntos' (array (n, 2) int32 de puntos (x, y)),
+        'forma' de la imagen, 'teselas' procesadas, 'fragmentos' detectados
+        y 'componentes' tras unirlos
+    """
+    if isinstance(imagen, str):
+        if rgb is None:
+            rgb = os.path.splitext(imagen)[1].lower() in ('.tif', '.tiff')
+        imagen = abrir_imagen_mapeada(imagen, forma, dtype)
+    rgb = bool(rgb)
+
+    alto, ancho = imagen.shape[:2]
+    conjuntos = UnionFind()
+    tamanos = []
+    desplazamientos = {}
+    costuras = {}
+
+    # ----- Primera pasada: fragmentos por tesela y uniones entre teselas -----
+    for fila, columna, y0, y1, x0, x1 in _recorrer_teselas(alto, ancho, tamano_tesela):
+        # solo hacen falta las costuras de la fila anterior
+        if columna == 0:
+            for clave in [clave for clave in costuras if clave[0] < fila - 1]:
+                del costuras[clave]
+
+        bordes = _bordes_tesela(imagen, y0, y1, x0, x1, halo, rgb, umbral_bajo, umbral_alto)
+        num_etiquetas, etiquetas, estadisticas, _ = cv2.connectedComponentsWithStats(bordes, connectivity=8)
+
+        # identificadores globales: la etiqueta 0 (fondo) pasa a -1
+        inicio = conjuntos.agregar(num_etiquetas - 1)
+        tamanos.extend(estadisticas[1:, cv2.CC_STAT_AREA])
+        desplazamientos[fila, columna] = inicio
+        globales = np.where(etiquetas > 0, etiquetas + inicio - 1, -1)
+
+        # costuras con la tesela de la izquierda, la de arriba y las diagonales de arriba
+        pares = []
+        if (fila, columna - 1) in costuras:
+            pares.append(_pares_costura(costuras[fila, columna - 1]['derecha'], globales[:, 0]))
+        if (fila - 1, columna) in costuras:
+            pares.append(_pares_costura(costuras[fila - 1, columna]['abajo'], globales[0, :]))
+        if (fila - 1, columna - 1) in costuras:
+            pares.append(np.array([[costuras[fila - 1, columna - 1]['abajo'][-1], globales[0, 0]]]))
+        if (fila - 1, columna + 1) in costuras:
+            pares.append(np.array([[costuras[fila - 1, columna + 1]['abajo'][0], globales[0, -1]]]))
+        for par in pares:
+            for a, b in par:
+                if a >= 0 and b >= 0:
+                    conjuntos.unir(int(a), int(b))
+
+        costuras[fila, columna] = {'derecha': globales[:, -1].copy(), 'abajo': globales[-1, :].copy()}
+
+    num_fragmentos = len(tamanos)
+    if num_fragmentos == 0:
+        return {'puntos': np.empty((0, 2), dtype=np.int32), 'forma': imagen.shape,
+                'teselas': len(desplazamientos), 'fragmentos': 0, 'componentes': 0}
+
+    # tamaño de cada componente sumando sus fragmentos
+    raices = np.array([conjuntos.raiz(i) for i in range(num_fragmentos)])
+    tamanos_componentes = np.bincount(raices, weights=tamanos, minlength=num_fragmentos)
+    mejor = int(np.argmax(tamanos_componentes))
+
+    # ----- Segunda pasada: píxeles de la componente elegida -----
+    puntos = []
+    for fila, columna, y0, y1, x0, x1 in _recorrer_teselas(alto, ancho, tamano_tesela):
+        inicio = desplazamientos[fila, columna]
+        fin = desplazamientos.get((fila, columna + 1), desplazamientos.get((fila + 1, 0), num_fragmentos))
+        locales = np.flatnonzero(raices[inicio:fin] == mejor) + 1
+        if len(locales) == 0:
+            continue
+
+        bordes = _bordes_tesela(imagen, y0, y1, x0, x1, halo, rgb, umbral_bajo, umbral_alto)
+        _, etiquetas = cv2.connectedComponents(bordes, connectivity=8)
+        ys, xs = np.nonzero(np.isin(etiquetas, locales))
+        puntos.append(np.column_stack((xs + x0, ys + y0)).astype(np.int32))
+
+    puntos = np.concatenate(puntos)
+    puntos = puntos[np.lexsort((puntos[:, 1], puntos[:, 0]))]
+    if not ordenar:
+        puntos = _ordenar_recorrido(puntos, ancho)
+
+    return {
+        'puntos': puntos,
+        'forma': imagen.shape,
+        'teselas': len(desplazamientos),
+        'fragmentos': num_fragmentos,
+        'componentes': len(np.unique(raices))
+    }